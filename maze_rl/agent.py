@@ -1,8 +1,16 @@
 # agent.py
 import numpy as np
 import random
+import heapq
+import json
+import os
 import config
 
+def metadata_path(path):
+    # Metadata lives next to the .npy file, e.g. q_table.npy -> q_table.json
+    # (same helper in maze_rl/ and travellingSalesman_rl/agent.py)
+    return os.path.splitext(path)[0] + ".json"
+
 class Agent:
     def __init__(self, maze, epsilon=config.EPSILON, alpha=config.ALPHA, gamma=config.GAMMA):
         self.maze = maze
@@ -12,8 +20,9 @@ class Agent:
         self.start_pos = (1, 1)     # Ensure this is a free space in your maze
         self.position = self.start_pos
         # Q-table: dimensions = (rows, cols, number of actions)
-        self.q_table = np.zeros((maze.rows, maze.cols, 4))
-    
+        self.q_table = np.zeros((maze.rows, maze.cols, 4), dtype=config.Q_DTYPE)
+        self.episodes_trained = 0
+
     def choose_action(self, state):
         r, c = state
         # Epsilon-greedy policy
@@ -32,3 +41,187 @@ class Agent:
     
     def reset(self):
         self.position = self.start_pos
+
+    def save(self, path=config.Q_TABLE_PATH):
+        """
+        Persist q_table as a .npy file plus a small .json with hyperparameters,
+        episode count and maze hash. A table memory-mapped from path is flushed in place.
+        """
+        if isinstance(self.q_table, np.memmap) and os.path.exists(path) \
+                and os.path.samefile(self.q_table.filename, path):
+            self.q_table.flush()
+        else:
+            # Write to a temporary file first so existing read-only maps stay valid
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, self.q_table)
+            os.replace(path + ".tmp", path)
+        metadata = {
+            "epsilon": self.epsilon,
+            "alpha": self.alpha,
+            "gamma": self.gamma,
+            "episodes": self.episodes_trained,
+            "grid_hash": self.maze.grid_hash(),
+        }
+        with open(metadata_path(path), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+    def load(self, path=config.Q_TABLE_PATH, mmap_mode="r"):
+        """
+        Memory-map a saved q_table without reading it into RAM.
+        mmap_mode "r" is read-only (demo/evaluation), "r+" resumes training and
+        writes updates back to the file. Returns the saved metadata.
+        """
+        with open(metadata_path(path)) as f:
+            metadata = json.load(f)
+        if metadata["grid_hash"] != self.maze.grid_hash():
+            raise ValueError(f"{path} was trained on a different maze")
+        q_table = np.load(path, mmap_mode=mmap_mode)
+        if q_table.shape != self.q_table.shape:
+            raise ValueError(f"{path} holds a {q_table.shape} Q-table, expected {self.q_table.shape}")
+        self.q_table = q_table
+        self.episodes_trained = metadata["episodes"]
+        return metadata
+
+class PlanningAgent(Agent):
+    """
+    Q-learning agent with model-based planning. Every real transition is stored
+    in a learned (deterministic) model, and each real step is followed by
+    planning_steps simulated backups drawn from the model: either ordered by
+    TD error through a priority queue (prioritized sweeping) or sampled
+    uniformly from previously seen state-action pairs (Dyna-Q).
+    """
+    def __init__(self, maze, epsilon=config.EPSILON, alpha=config.ALPHA, gamma=config.GAMMA,
+                 planning_steps=config.PLANNING_STEPS, mode=config.PLANNING_MODE,
+                 threshold=config.PLANNING_THRESHOLD):
+        super().__init__(maze, epsilon, alpha, gamma)
+        if mode not in ("prioritized", "dyna"):
+            raise ValueError(f"Unknown planning mode: {mode}")
+        self.planning_steps = planning_steps
+        self.mode = mode
+        self.threshold = threshold
+        # Learned model: next state and reward per (row, col, action), -1 = not seen yet
+        self.model_next = np.full(self.q_table.shape, -1, dtype=np.int32)
+        self.model_reward = np.zeros(self.q_table.shape, dtype=config.Q_DTYPE)
+        self.seen = []              # Observed (state, action) pairs for Dyna sampling
+        self.predecessors = {}      # state -> set of (previous_state, action) leading to it
+        self.queue = []             # Max-priority queue of (-priority, state, action)
+
+    def _model(self, state, action):
+        r, c = state
+        next_state = divmod(int(self.model_next[r, c, action]), self.maze.cols)
+        return self.model_reward[r, c, action], next_state
+
+    def _priority(self, state, action):
+        reward, next_state = self._model(state, action)
+        r, c = state
+        return abs(reward + self.gamma * np.max(self.q_table[next_state]) - self.q_table[r, c, action])
+
+    def _queue_predecessors(self, state):
+        for prev_state, prev_action in self.predecessors.get(state, ()):
+            priority = self._priority(prev_state, prev_action)
+            if priority > self.threshold:
+                heapq.heappush(self.queue, (-priority, prev_state, prev_action))
+
+    def update_q(self, state, action, reward, next_state):
+        # Direct reinforcement learning from the real transition
+        super().update_q(state, action, reward, next_state)
+
+        # Model learning
+        r, c = state
+        if self.model_next[r, c, action] < 0:
+            self.seen.append((state, action))
+        self.model_next[r, c, action] = next_state[0] * self.maze.cols + next_state[1]
+        self.model_reward[r, c, action] = reward
+        self.predecessors.setdefault(next_state, set()).add((state, action))
+
+        # Planning with simulated experience
+        if self.mode == "dyna":
+            for _ in range(self.planning_steps):
+                sim_state, sim_action = random.choice(self.seen)
+                sim_reward, sim_next = self._model(sim_state, sim_action)
+                super().update_q(sim_state, sim_action, sim_reward, sim_next)
+        else:
+            # Q(state) may have changed, so its predecessors are candidates for a backup
+            self._queue_predecessors(state)
+            for _ in range(self.planning_steps):
+                if not self.queue:
+                    break
+                _, sim_state, sim_action = heapq.heappop(self.queue)
+                sim_reward, sim_next = self._model(sim_state, sim_action)
+                super().update_q(sim_state, sim_action, sim_reward, sim_next)
+                self._queue_predecessors(sim_state)
+
+class TraceAgent(Agent):
+    """
+    Watkins Q(lambda) or Sarsa(lambda) with replacing eligibility traces.
+    Dense traces are an array shaped like q_table, so every step updates the
+    whole table in one array operation; sparse traces keep only the flat
+    indices and values of traces above `cutoff`.
+    Both methods pick the next action while updating, and choose_action
+    returns that action on the following step.
+    """
+    def __init__(self, maze, epsilon=config.EPSILON, alpha=config.ALPHA, gamma=config.GAMMA,
+                 lam=config.LAMBDA, method=config.TRACE_METHOD,
+                 sparse=config.SPARSE_TRACES, cutoff=config.TRACE_CUTOFF):
+        super().__init__(maze, epsilon, alpha, gamma)
+        if method not in ("watkins", "sarsa"):
+            raise ValueError(f"Unknown trace method: {method}")
+        self.lam = lam
+        self.method = method
+        self.sparse = sparse
+        self.cutoff = cutoff
+        self.reset_traces()
+
+    def reset_traces(self):
+        self.next_action = None
+        if self.sparse:
+            self.trace_index = np.zeros(0, dtype=np.int64)
+            self.trace_value = np.zeros(0, dtype=self.q_table.dtype)
+        else:
+            self.traces = np.zeros_like(self.q_table)
+
+    def reset(self):
+        super().reset()
+        self.reset_traces()
+
+    def choose_action(self, state):
+        if self.next_action is not None:
+            action, self.next_action = self.next_action, None
+            return action
+        return super().choose_action(state)
+
+    def update_q(self, state, action, reward, next_state):
+        r, c = state
+        next_action = super().choose_action(next_state)
+        self.next_action = next_action
+        q_next = self.q_table[next_state]
+        best_next = np.max(q_next)
+        if self.method == "sarsa":
+            target = reward + self.gamma * q_next[next_action]
+        else:
+            target = reward + self.gamma * best_next
+        delta = target - self.q_table[r, c, action]
+        # Watkins Q(lambda) cuts the traces after an exploratory action
+        decay = self.gamma * self.lam
+        if self.method == "watkins" and q_next[next_action] != best_next:
+            decay = 0.0
+
+        # Replacing traces: the visited pair gets trace 1 and the other actions of the state are cleared
+        if self.sparse:
+            flat = (r * self.maze.cols + c) * 4 + action
+            self.trace_value[self.trace_index // 4 == flat // 4] = 0
+            hit = np.flatnonzero(self.trace_index == flat)
+            if hit.size:
+                self.trace_value[hit] = 1
+            else:
+                self.trace_index = np.append(self.trace_index, flat)
+                self.trace_value = np.append(self.trace_value, self.trace_value.dtype.type(1))
+            self.q_table.reshape(-1)[self.trace_index] += self.alpha * delta * self.trace_value
+            self.trace_value *= decay
+            keep = self.trace_value >= self.cutoff
+            self.trace_index, self.trace_value = self.trace_index[keep], self.trace_value[keep]
+        else:
+            self.traces[r, c] = 0
+            self.traces[r, c, action] = 1
+            self.q_table += self.alpha * delta * self.traces
+            self.traces *= decay
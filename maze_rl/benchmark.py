@@ -0,0 +1,100 @@
+# benchmark.py
+import random
+import time
+import numpy as np
+import config
+from maze import Maze
+from agent import Agent, PlanningAgent, TraceAgent
+from maze_generator import generate_maze
+from metrics import MetricsLogger
+from trainer import BatchTrainer
+
+def greedy_path_length(agent, maze, max_steps=config.MAX_STEPS):
+    # Length of the greedy rollout from the start position, or None if it never reaches the goal
+    state = agent.start_pos
+    for step in range(1, max_steps + 1):
+        action = int(np.argmax(agent.q_table[state]))
+        state, _, done = maze.step(state, action)
+        if done:
+            return step
+    return None
+
+def run_until_converged(agent, maze, max_episodes=1000, max_steps=config.MAX_STEPS, patience=5):
+    """
+    Train headless until the greedy path length has been stable for `patience`
+    episodes. Returns (episodes, real environment steps, wall-clock seconds),
+    with episodes = None if the agent did not converge.
+    """
+    real_steps = 0
+    stable = 0
+    last_length = None
+    start = time.perf_counter()
+    for episode in range(1, max_episodes + 1):
+        agent.reset()
+        state = agent.position
+        done = False
+        step = 0
+        while not done and step < max_steps:
+            action = agent.choose_action(state)
+            next_state, reward, done = maze.step(state, action)
+            agent.update_q(state, action, reward, next_state)
+            state = next_state
+            step += 1
+        real_steps += step
+
+        length = greedy_path_length(agent, maze, max_steps)
+        stable = stable + 1 if length is not None and length == last_length else 0
+        last_length = length
+        if stable >= patience:
+            return episode, real_steps, time.perf_counter() - start
+    return None, real_steps, time.perf_counter() - start
+
+def compare_agents(seeds=5, maze=None):
+    """Report real steps and wall time to convergence for plain Q-learning vs. planning and trace agents."""
+    maze = maze or Maze()
+    variants = {
+        "Q-learning": lambda: Agent(maze),
+        "Dyna-Q": lambda: PlanningAgent(maze, mode="dyna"),
+        "Prioritized sweeping": lambda: PlanningAgent(maze, mode="prioritized"),
+        "Watkins Q(lambda)": lambda: TraceAgent(maze, method="watkins"),
+        "Sarsa(lambda)": lambda: TraceAgent(maze, method="sarsa"),
+        "Sparse Q(lambda)": lambda: TraceAgent(maze, method="watkins", sparse=True),
+    }
+    print(f"{'Agent':<22}{'episodes':>10}{'real steps':>12}{'seconds':>10}")
+    for name, make_agent in variants.items():
+        results = []
+        for seed in range(seeds):
+            random.seed(seed)
+            results.append(run_until_converged(make_agent(), maze))
+        converged = [r for r in results if r[0] is not None]
+        if not converged:
+            print(f"{name:<22}{'did not converge':>32}")
+            continue
+        episodes, steps, seconds = np.mean(converged, axis=0)
+        print(f"{name:<22}{episodes:>10.1f}{steps:>12.0f}{seconds:>10.3f}"
+              f"  ({len(converged)}/{seeds} converged)")
+
+def stress_test(size=2001, algorithm="backtracker", num_agents=8, num_episodes=5, seed=0):
+    """Time maze generation, table building and batch training on a large generated maze."""
+    start = time.perf_counter()
+    grid = generate_maze(size, size, seed=seed, algorithm=algorithm)
+    generated = time.perf_counter()
+    maze = Maze(grid, cell_size=1)
+    built = time.perf_counter()
+    agent = Agent(maze)
+    print(f"{size}x{size} {algorithm} maze: generated in {generated - start:.2f}s, "
+          f"tables built in {built - generated:.2f}s")
+    table_bytes = maze.next_cell.nbytes + maze.rewards.nbytes + maze.dones.nbytes
+    print(f"grid {maze.grid.nbytes / 2**20:.1f} MiB, transition tables {table_bytes / 2**20:.1f} MiB, "
+          f"Q-table {agent.q_table.nbytes / 2**20:.1f} MiB")
+
+    metrics = MetricsLogger(extra_fields=("solved",), name="Stress test")
+    trainer = BatchTrainer(agent, maze, num_agents=num_agents, num_episodes=num_episodes,
+                           max_steps=10 * size, seed=seed, metrics=metrics)
+    start = time.perf_counter()
+    trainer.train()
+    elapsed = time.perf_counter() - start
+    print(f"Batch training: {elapsed:.2f}s, {trainer.metrics.total_steps / elapsed:,.0f} agent steps/s")
+
+if __name__ == '__main__':
+    compare_agents()
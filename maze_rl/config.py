@@ -13,11 +13,65 @@ MAX_STEPS = 200
 CLOCK_TICK_TRAINING = 100
 CLOCK_TICK_DEMO = 5
 
+# Headless batch training: NUM_AGENTS independent Q-learners trained in lockstep
+# (plain Q-learning only: it cannot be combined with USE_PLANNING or USE_TRACES).
+# RENDER_EVERY > 0 draws agent 0 every RENDER_EVERY episodes (0 = never render).
+HEADLESS_TRAINING = False
+NUM_AGENTS = 64
+RENDER_EVERY = 0
+
 # RL hyperparameters
 EPSILON = 0.1  # Exploration rate
 ALPHA = 0.5    # Learning rate
 GAMMA = 0.9    # Discount factor
 
+# Model-based planning (PlanningAgent): USE_PLANNING enables it in main.py
+# (single-agent training only), PLANNING_STEPS simulated backups per real step,
+# "prioritized" sweeping or plain random "dyna" replay, and the minimum TD error
+# for a state-action pair to be queued in prioritized sweeping.
+USE_PLANNING = False
+PLANNING_STEPS = 10
+PLANNING_MODE = "prioritized"
+PLANNING_THRESHOLD = 1e-4
+
+# Eligibility traces (TraceAgent): USE_TRACES enables it in main.py, TRACE_METHOD is
+# "watkins" (Q(lambda)) or "sarsa" (Sarsa(lambda)). SPARSE_TRACES keeps only the
+# traces above TRACE_CUTOFF instead of a dense array, which suits large mazes.
+USE_TRACES = False
+LAMBDA = 0.5
+TRACE_METHOD = "watkins"
+SPARSE_TRACES = False
+TRACE_CUTOFF = 1e-3
+
+# Saved Q-table (.npy, with a .json metadata file next to it). With a saved table
+# TRAIN_ON_LAUNCH = True resumes training from it; False maps it read-only and
+# goes straight to the demonstration.
+Q_TABLE_PATH = "maze_q_table.npy"
+TRAIN_ON_LAUNCH = True
+
+# Storage type of Q-tables (float32 halves the memory of large mazes)
+Q_DTYPE = "float32"
+
+# Training metrics (metrics.py): per-episode rows are written to METRICS_PATH
+# ("jsonl", "csv" or "npz" per METRICS_FORMAT; None keeps them in memory) and the
+# console shows a throughput summary at most every METRICS_SUMMARY_SECONDS.
+METRICS_PATH = "logs/maze_metrics.jsonl"
+METRICS_FORMAT = "jsonl"
+METRICS_SUMMARY_SECONDS = 5.0
+
+# Procedural maze: set MAZE_SIZE = (rows, cols), e.g. (2001, 2001), to train on a
+# generated maze instead of MAZE_GRID. MAZE_ALGORITHM is "backtracker" or "binary_tree".
+MAZE_SIZE = None
+MAZE_SEED = 0
+MAZE_ALGORITHM = "backtracker"
+# Generated mazes are drawn with cells shrunk to fit MAX_WINDOW_SIZE pixels; when even
+# one pixel per cell does not fit, they train without a window and skip the demo.
+# Episodes get STEPS_PER_CELL steps per free cell (at least MAX_STEPS), and batch
+# training uses at most NUM_AGENTS agents whose Q-tables fit in BATCH_Q_TABLE_MB.
+MAX_WINDOW_SIZE = 800
+STEPS_PER_CELL = 2
+BATCH_Q_TABLE_MB = 512
+
 # Maze grid definition: 1 = wall, 0 = free space, 3 = goal
 MAZE_GRID = [
     [1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1],
@@ -0,0 +1,74 @@
+# evaluator.py
+import numpy as np
+
+class PolicyEvaluator:
+    """
+    Evaluates the greedy policy of a Q-table from every free cell at once.
+    BFS shortest distances to the goal are computed once per maze; each call to
+    evaluate() follows the greedy action from all cells simultaneously using
+    pointer doubling, so it needs only O(log(free cells)) array passes.
+    """
+    def __init__(self, maze, start_pos=(1, 1)):
+        self.maze = maze
+        flat_grid = maze.grid.ravel()
+        # Free-cell index: flat cell -> position in self.cells (-1 for walls)
+        self.cells = np.flatnonzero(flat_grid != 1)
+        self.index_of = np.full(flat_grid.size, -1, dtype=np.int32)
+        self.index_of[self.cells] = np.arange(len(self.cells))
+        self.start = self.index_of[start_pos[0] * maze.cols + start_pos[1]]
+        # Successor of every free cell under each action
+        self.next_index = self.index_of[maze.next_cell.reshape(-1, 4)[self.cells]]
+        self.is_goal = flat_grid[self.cells] == 3
+        self.distances = self._bfs_distances()
+        # Only cells that can reach the goal are scored; goal cells themselves are excluded
+        self.scored = (self.distances > 0)
+
+    def _bfs_distances(self):
+        # Layered BFS from the goal; moves are reversible, so successors double as predecessors
+        distances = np.full(len(self.cells), -1, dtype=np.int32)
+        frontier = np.flatnonzero(self.is_goal)
+        distances[frontier] = 0
+        depth = 0
+        while len(frontier):
+            depth += 1
+            neighbours = np.unique(self.next_index[frontier].ravel())
+            frontier = neighbours[distances[neighbours] < 0]
+            distances[frontier] = depth
+        return distances
+
+    def evaluate(self, q_table):
+        """
+        Evaluate the greedy policy of q_table, shaped (rows, cols, 4) or a batch
+        (num_agents, rows, cols, 4). Returns a dict with, per Q-table:
+        success_rate - fraction of cells whose greedy path reaches the goal,
+        loop_rate - fraction of cells whose greedy path cycles forever,
+        path_ratio - mean greedy path length / BFS shortest length over successful cells,
+        start_steps - greedy path length from the agent start cell (-1 if it loops).
+        """
+        q_table = np.asarray(q_table)
+        batched = q_table.ndim == 4
+        q = q_table.reshape(-1, self.maze.rows * self.maze.cols, 4)[:, self.cells]
+        actions = np.argmax(q, axis=2)
+
+        # jump[c] = cell reached after 2^k greedy steps, cost[c] = non-goal cells passed on the way.
+        # The goal is absorbing, so after enough doublings every cell sits on the goal or in a loop.
+        jump = np.take_along_axis(self.next_index[None], actions[..., None], axis=2)[..., 0]
+        jump[:, self.is_goal] = np.flatnonzero(self.is_goal)
+        cost = np.broadcast_to(~self.is_goal, jump.shape).astype(np.int32)
+        for _ in range(max(1, int(np.ceil(np.log2(len(self.cells) + 1))))):
+            cost = cost + np.take_along_axis(cost, jump, axis=1)
+            jump = np.take_along_axis(jump, jump, axis=1)
+
+        reached = self.is_goal[jump] & self.scored
+        scored = np.count_nonzero(self.scored)
+        ratios = np.where(reached, cost / np.maximum(self.distances, 1), 0.0)
+        num_reached = np.count_nonzero(reached, axis=1)
+        result = {
+            "success_rate": num_reached / scored,
+            "loop_rate": 1 - num_reached / scored,
+            "path_ratio": ratios.sum(axis=1) / np.maximum(num_reached, 1),
+            "start_steps": np.where(reached[:, self.start], cost[:, self.start], -1),
+        }
+        if not batched:
+            result = {key: value[0].item() for key, value in result.items()}
+        return result
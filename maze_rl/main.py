@@ -1,24 +1,73 @@
 # main.py
 import pygame
+import os
 import sys
 import config
 from maze import Maze
-from agent import Agent
-from trainer import Trainer
+from agent import Agent, PlanningAgent, TraceAgent
+from trainer import Trainer, BatchTrainer
+from maze_generator import generate_maze
+from evaluator import PolicyEvaluator
 
 def main():
+    # Initialize the maze, agent, and trainer
+    if config.MAZE_SIZE:
+        # Shrink the cells so the window fits; 0 means the maze is too large to show at all
+        cell_size = min(config.CELL_SIZE, config.MAX_WINDOW_SIZE // max(config.MAZE_SIZE))
+        maze = Maze(generate_maze(*config.MAZE_SIZE, seed=config.MAZE_SEED, algorithm=config.MAZE_ALGORITHM),
+                    cell_size=cell_size)
+    else:
+        maze = Maze()
+
     pygame.init()
-    screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
-    pygame.display.set_caption("Complex RL Maze Navigation")
+    if maze.cell_size > 0:
+        screen = pygame.display.set_mode((maze.cols * maze.cell_size, maze.rows * maze.cell_size))
+        pygame.display.set_caption("Complex RL Maze Navigation")
+    else:
+        screen = None
+        print(f"A {maze.rows}x{maze.cols} maze does not fit in a {config.MAX_WINDOW_SIZE} px window, "
+              f"training without one.")
     clock = pygame.time.Clock()
 
-    # Initialize the maze, agent, and trainer
-    maze = Maze()
-    agent = Agent(maze)
-    trainer = Trainer(agent, maze)
+    if config.USE_PLANNING:
+        agent = PlanningAgent(maze)
+    elif config.USE_TRACES:
+        agent = TraceAgent(maze)
+    else:
+        agent = Agent(maze)
+    evaluator = PolicyEvaluator(maze, agent.start_pos)
+
+    # MAX_STEPS and NUM_AGENTS suit the built-in maze; generated ones need longer episodes
+    # to reach the goal at all, and fewer agents to keep the batch Q-tables in memory
+    max_steps, num_agents = config.MAX_STEPS, config.NUM_AGENTS
+    if config.MAZE_SIZE:
+        max_steps = max(max_steps, config.STEPS_PER_CELL * len(evaluator.cells))
+        num_agents = max(1, min(num_agents, config.BATCH_Q_TABLE_MB * 2**20 // agent.q_table.nbytes))
+
+    # Resume from a saved Q-table, or map it read-only to skip straight to the demo
+    loaded = False
+    if os.path.exists(config.Q_TABLE_PATH):
+        try:
+            metadata = agent.load(config.Q_TABLE_PATH, mmap_mode="r+" if config.TRAIN_ON_LAUNCH else "r")
+            loaded = True
+            print(f"Loaded Q-table trained for {metadata['episodes']} episodes from {config.Q_TABLE_PATH}")
+        except (OSError, ValueError) as e:
+            print("Failed to load the saved Q-table, starting fresh.", e)
 
     # Run the training loop
-    trainer.train(screen, clock)
+    if config.TRAIN_ON_LAUNCH or not loaded:
+        if config.HEADLESS_TRAINING:
+            trainer = BatchTrainer(agent, maze, num_agents=num_agents, max_steps=max_steps, evaluator=evaluator)
+        else:
+            trainer = Trainer(agent, maze, max_steps=max_steps, evaluator=evaluator)
+        trainer.train(screen, clock)
+        agent.save(config.Q_TABLE_PATH)
+    result = evaluator.evaluate(agent.q_table)
+    print(f"Greedy policy reaches the goal from {result['success_rate']:.1%} of cells "
+          f"({result['loop_rate']:.1%} loop), path length ratio to BFS optimum: {result['path_ratio']:.2f}")
+
+    if screen is None:
+        return
 
     # Demonstration: disable exploration and show the learned policy
     print("Now demonstrating the learned policy...")
@@ -38,14 +87,13 @@ def main():
         state = next_state
         path.append(state)
 
-        screen.fill((0, 0, 0))
         maze.draw(screen, state)
         # Draw the path taken so far (blue outline)
         for pos in path:
             r, c = pos
-            rect = pygame.Rect(c * config.CELL_SIZE, r * config.CELL_SIZE,
-                               config.CELL_SIZE, config.CELL_SIZE)
-            pygame.draw.rect(screen, (0, 0, 255), rect, 3)
+            rect = pygame.Rect(c * maze.cell_size, r * maze.cell_size,
+                               maze.cell_size, maze.cell_size)
+            pygame.draw.rect(screen, (0, 0, 255), rect, min(3, maze.cell_size))
         pygame.display.flip()
         clock.tick(config.CLOCK_TICK_DEMO)
 
@@ -1,43 +1,121 @@
 # maze.py
 import pygame
+import hashlib
+import numpy as np
 import config
 
+# Row/column offsets for actions 0 = Up, 1 = Right, 2 = Down, 3 = Left
+ACTION_DELTAS = np.array([[-1, 0], [0, 1], [1, 0], [0, -1]])
+
+# Rewards for bumping into a wall/boundary, reaching the goal and a regular step
+WALL_REWARD = -1.0
+GOAL_REWARD = 10.0
+STEP_REWARD = -0.1
+
 class Maze:
     def __init__(self, grid=config.MAZE_GRID, cell_size=config.CELL_SIZE):
-        self.grid = grid
         self.cell_size = cell_size
-        self.rows = len(grid)
-        self.cols = len(grid[0])
-    
-    def draw(self, screen, agent_pos):
-        # Draw maze cells
-        for r in range(self.rows):
-            for c in range(self.cols):
-                rect = pygame.Rect(c * self.cell_size, r * self.cell_size,
-                                   self.cell_size, self.cell_size)
-                if self.grid[r][c] == 1:
-                    pygame.draw.rect(screen, (0, 0, 0), rect)  # Wall: black
-                elif self.grid[r][c] == 0:
-                    pygame.draw.rect(screen, (255, 255, 255), rect)  # Free space: white
-                elif self.grid[r][c] == 3:
-                    pygame.draw.rect(screen, (0, 255, 0), rect)  # Goal: green
-        
-        # Draw grid lines for clarity
+        self.grid = grid
+
+    @property
+    def grid(self):
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid):
+        # The grid is stored as a compact uint8 array; assigning a new grid rebuilds the transition table
+        self._grid = np.asarray(grid, dtype=np.uint8)
+        self.rows, self.cols = self._grid.shape
+        self.build_transition_table()
+        self.invalidate_render_cache()
+
+    def grid_hash(self):
+        # Identifies the maze layout, e.g. to check that a saved Q-table belongs to it
+        return hashlib.sha1(np.array(self.grid.shape).tobytes() + self.grid.tobytes()).hexdigest()
+
+    def build_transition_table(self):
+        """
+        Precompute the outcome of every (row, col, action):
+        next_cell holds the flat index (row * cols + col) of the next position,
+        rewards and dones the reward and goal flag of the move.
+        """
+        cells = self.grid
+        deltas = ACTION_DELTAS.astype(np.int32)
+        r = np.arange(self.rows, dtype=np.int32)[:, None, None]
+        c = np.arange(self.cols, dtype=np.int32)[None, :, None]
+        new_r = r + deltas[:, 0]
+        new_c = c + deltas[:, 1]
+
+        # Moves off the grid or into a wall leave the agent where it is
+        inside = (new_r >= 0) & (new_r < self.rows) & (new_c >= 0) & (new_c < self.cols)
+        target = np.ones((self.rows, self.cols, 4), dtype=np.uint8)
+        target[inside] = cells[np.broadcast_to(new_r, inside.shape)[inside],
+                               np.broadcast_to(new_c, inside.shape)[inside]]
+        blocked = target == 1
+        new_r = np.where(blocked, r, new_r)
+        new_c = np.where(blocked, c, new_c)
+
+        self.next_cell = new_r * np.int32(self.cols) + new_c
+        self.dones = target == 3
+        self.rewards = np.full(target.shape, STEP_REWARD, dtype=np.float32)
+        self.rewards[blocked] = WALL_REWARD
+        self.rewards[self.dones] = GOAL_REWARD
+
+    def invalidate_render_cache(self):
+        # Force the static background to be re-baked on the next draw
+        self._background = None
+        self._drawn_on = None
+        self._agent_rect = None
+
+    def _build_background(self):
+        # Bake walls (black), free space (white), the goal (green) and the grid lines into one surface
+        colors = np.zeros((self.rows, self.cols, 3), dtype=np.uint8)
+        colors[self.grid == 0] = (255, 255, 255)
+        colors[self.grid == 3] = (0, 255, 0)
+        cells = pygame.surfarray.make_surface(colors.transpose(1, 0, 2))
+        background = pygame.transform.scale(cells, (self.cols * self.cell_size, self.rows * self.cell_size))
+
+        # Draw grid lines for clarity (not on cells shrunk so small the lines would cover them)
+        if self.cell_size < 4:
+            return background
         for r in range(self.rows):
-            pygame.draw.line(screen, (200, 200, 200),
+            pygame.draw.line(background, (200, 200, 200),
                              (0, r * self.cell_size),
                              (self.cols * self.cell_size, r * self.cell_size))
         for c in range(self.cols):
-            pygame.draw.line(screen, (200, 200, 200),
+            pygame.draw.line(background, (200, 200, 200),
                              (c * self.cell_size, 0),
                              (c * self.cell_size, self.rows * self.cell_size))
-        
+        return background
+
+    def draw(self, screen, agent_pos, full=False):
+        """
+        Draw the maze and the agent. The static background is baked once; later
+        calls only restore the cell the agent left and draw its new cell.
+        Pass full=True if something else has drawn over the screen.
+        Returns the list of dirty rects for pygame.display.update.
+        """
+        if self._background is None:
+            self._background = self._build_background()
+
+        dirty = []
+        if full or self._drawn_on is not screen or self._agent_rect is None:
+            screen.blit(self._background, (0, 0))
+            self._drawn_on = screen
+            dirty.append(self._background.get_rect())
+        else:
+            # Restore the background under the previous agent position
+            screen.blit(self._background, self._agent_rect, self._agent_rect)
+            dirty.append(self._agent_rect)
+
         # Draw the agent as a red square
-        agent_rect = pygame.Rect(agent_pos[1] * self.cell_size,
-                                 agent_pos[0] * self.cell_size,
-                                 self.cell_size, self.cell_size)
-        pygame.draw.rect(screen, (255, 0, 0), agent_rect)
-    
+        self._agent_rect = pygame.Rect(agent_pos[1] * self.cell_size,
+                                       agent_pos[0] * self.cell_size,
+                                       self.cell_size, self.cell_size)
+        pygame.draw.rect(screen, (255, 0, 0), self._agent_rect)
+        dirty.append(self._agent_rect)
+        return dirty
+
     def step(self, pos, action):
         """
         Process a step in the maze.
@@ -45,27 +123,17 @@ class Maze:
         Returns: (new_position, reward, done)
         """
         r, c = pos
-        new_r, new_c = r, c
-
-        if action == 0:  # Up
-            new_r = r - 1
-        elif action == 1:  # Right
-            new_c = c + 1
-        elif action == 2:  # Down
-            new_r = r + 1
-        elif action == 3:  # Left
-            new_c = c - 1
-
-        # Check boundaries
-        if new_r < 0 or new_r >= self.rows or new_c < 0 or new_c >= self.cols:
-            return pos, -1, False
-
-        # Check if hitting a wall
-        if self.grid[new_r][new_c] == 1:
-            return pos, -1, False
-
-        new_pos = (new_r, new_c)
-        if self.grid[new_r][new_c] == 3:
-            return new_pos, 10, True  # Reached goal
-        else:
-            return new_pos, -0.1, False  # Regular step cost
+        new_pos = divmod(int(self.next_cell[r, c, action]), self.cols)
+        return new_pos, float(self.rewards[r, c, action]), bool(self.dones[r, c, action])
+
+    def step_batch(self, positions, actions):
+        """
+        Vectorized step for many positions at once.
+        positions: (N, 2) array of (row, col), actions: (N,) array.
+        Returns: (new_positions, rewards, dones) as arrays.
+        """
+        positions = np.asarray(positions)
+        r, c = positions[:, 0], positions[:, 1]
+        cells = self.next_cell[r, c, actions]
+        new_positions = np.stack(np.divmod(cells, self.cols), axis=1)
+        return new_positions, self.rewards[r, c, actions], self.dones[r, c, actions]
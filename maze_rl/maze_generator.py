@@ -0,0 +1,67 @@
+# maze_generator.py
+import random
+import numpy as np
+
+def generate_maze(rows, cols, seed=None, algorithm="backtracker"):
+    """
+    Generate a perfect maze as a uint8 grid (1 = wall, 0 = free space, 3 = goal).
+    Cells sit on odd coordinates, so the start position (1, 1) is always free and
+    the goal is the bottom-right cell.
+    algorithm: "backtracker" (long winding corridors) or "binary_tree"
+    (fully vectorized, fastest for very large mazes).
+    """
+    if rows < 3 or cols < 3:
+        raise ValueError("A maze needs at least 3 rows and 3 columns")
+    h, w = (rows - 1) // 2, (cols - 1) // 2
+    grid = np.ones((rows, cols), dtype=np.uint8)
+    grid[1:2 * h:2, 1:2 * w:2] = 0
+
+    if algorithm == "backtracker":
+        _carve_backtracker(grid, h, w, random.Random(seed))
+    elif algorithm == "binary_tree":
+        _carve_binary_tree(grid, h, w, np.random.default_rng(seed))
+    else:
+        raise ValueError(f"Unknown maze algorithm: {algorithm}")
+
+    grid[2 * h - 1, 2 * w - 1] = 3
+    return grid
+
+def _carve_backtracker(grid, h, w, rng):
+    # Iterative depth-first search over the h x w cells, knocking down the wall
+    # between a cell and a random unvisited neighbour.
+    visited = bytearray(h * w)
+    visited[0] = 1
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        i, j = divmod(cell, w)
+        options = []
+        if i > 0 and not visited[cell - w]:
+            options.append(cell - w)
+        if i < h - 1 and not visited[cell + w]:
+            options.append(cell + w)
+        if j > 0 and not visited[cell - 1]:
+            options.append(cell - 1)
+        if j < w - 1 and not visited[cell + 1]:
+            options.append(cell + 1)
+        if not options:
+            stack.pop()
+            continue
+        nxt = options[rng.randrange(len(options))]
+        visited[nxt] = 1
+        ni, nj = divmod(nxt, w)
+        grid[i + ni + 1, j + nj + 1] = 0
+        stack.append(nxt)
+
+def _carve_binary_tree(grid, h, w, rng):
+    # Every cell opens either its north or its west wall; the first row can only
+    # go west and the first column only north, which connects everything to (1, 1).
+    north = rng.random((h, w)) < 0.5
+    north[0, :] = False
+    north[1:, 0] = True
+    west = ~north
+    west[0, 0] = False
+    i, j = np.nonzero(north)
+    grid[2 * i, 2 * j + 1] = 0
+    i, j = np.nonzero(west)
+    grid[2 * i + 1, 2 * j] = 0
@@ -0,0 +1,23 @@
+# test_maze_trainer.py
+from agent import Agent
+from evaluator import PolicyEvaluator
+from maze import Maze
+from metrics import MetricsLogger
+from trainer import BatchTrainer, Trainer
+
+def test_trainers_accept_logger_without_extra_fields():
+    maze = Maze()
+    agent = Agent(maze)
+    evaluator = PolicyEvaluator(maze, agent.start_pos)
+    for trainer_class in (Trainer, BatchTrainer):
+        metrics = MetricsLogger(name="bare")
+        trainer_class(agent, maze, num_episodes=3, evaluator=evaluator, metrics=metrics).train()
+        assert metrics.count == 3
+
+def test_batch_trainer_with_no_episodes():
+    maze = Maze()
+    agent = Agent(maze)
+    evaluator = PolicyEvaluator(maze, agent.start_pos)
+    BatchTrainer(agent, maze, num_agents=2, num_episodes=0, evaluator=evaluator,
+                 metrics=MetricsLogger(name="empty")).train()
+    assert agent.episodes_trained == 0
@@ -1,45 +1,180 @@
 # trainer.py
 import pygame
 import sys
+import numpy as np
 import config
+from agent import Agent
+from metrics import MetricsLogger
+
+def default_metrics(name, extra_fields=()):
+    # Metrics logger configured from config.py
+    return MetricsLogger(config.METRICS_PATH, config.METRICS_FORMAT,
+                         summary_seconds=config.METRICS_SUMMARY_SECONDS,
+                         extra_fields=extra_fields, name=name)
+
+def log_episode(metrics, reward, steps, epsilon, **extra):
+    # Log only the extra fields the logger has columns for, so a caller's logger never breaks training
+    metrics.log(reward, steps, epsilon=epsilon,
+                **{field: value for field, value in extra.items() if field in metrics.extra_fields})
+
+def handle_quit_events():
+    # Process Pygame events to allow window closure
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
 
 class Trainer:
     def __init__(self, agent, maze,
                  num_episodes=config.NUM_EPISODES,
                  max_steps=config.MAX_STEPS,
-                 clock_tick=config.CLOCK_TICK_TRAINING):
+                 clock_tick=config.CLOCK_TICK_TRAINING,
+                 render_every=1,
+                 evaluator=None,
+                 metrics=None):
         self.agent = agent
         self.maze = maze
         self.num_episodes = num_episodes
         self.max_steps = max_steps
         self.clock_tick = clock_tick
-    
-    def train(self, screen, clock):
+        self.render_every = render_every
+        self.evaluator = evaluator
+        self.metrics = metrics
+
+    def train(self, screen=None, clock=None):
+        """
+        Train a single agent. Without a screen (or with render_every=0) the
+        loop runs headless at full speed.
+        """
         print("Training...")
+        metrics = self.metrics or default_metrics("Maze", ("success_rate", "path_ratio"))
         for episode in range(self.num_episodes):
+            render = screen is not None and self.render_every > 0 and episode % self.render_every == 0
             self.agent.reset()
             state = self.agent.position
             done = False
             step = 0
+            total_reward = 0.0
             while not done and step < self.max_steps:
-                # Process Pygame events to allow window closure
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        sys.exit()
-
                 action = self.agent.choose_action(state)
                 next_state, reward, done = self.maze.step(state, action)
                 self.agent.update_q(state, action, reward, next_state)
+                total_reward += reward
                 state = next_state
                 self.agent.position = state
 
                 # Optional visualization during training
-                screen.fill((0, 0, 0))
-                self.maze.draw(screen, self.agent.position)
-                pygame.display.flip()
-                clock.tick(self.clock_tick)
+                if render:
+                    handle_quit_events()
+                    pygame.display.update(self.maze.draw(screen, self.agent.position))
+                    clock.tick(self.clock_tick)
                 step += 1
 
-            print(f"Episode {episode+1}/{self.num_episodes}, steps: {step}")
+            self.agent.episodes_trained += 1
+            greedy = {}
+            if self.evaluator is not None:
+                result = self.evaluator.evaluate(self.agent.q_table)
+                greedy = {"success_rate": result["success_rate"], "path_ratio": result["path_ratio"]}
+            log_episode(metrics, total_reward, step, self.agent.epsilon, **greedy)
+        metrics.close()
         print("Training completed.")
+
+class BatchTrainer:
+    """
+    Trains num_agents independent Q-learners in lockstep. Every agent has its
+    own Q-table slice, and action selection and Q updates run as NumPy array
+    operations over the whole batch. Agent 0 is drawn every render_every
+    episodes when a screen is given; otherwise training is fully headless.
+    """
+    def __init__(self, agent, maze,
+                 num_agents=config.NUM_AGENTS,
+                 num_episodes=config.NUM_EPISODES,
+                 max_steps=config.MAX_STEPS,
+                 clock_tick=config.CLOCK_TICK_TRAINING,
+                 render_every=config.RENDER_EVERY,
+                 seed=None,
+                 evaluator=None,
+                 metrics=None):
+        # The batch runs plain Q-learning on its own tables, so planning or trace learners would be ignored
+        if type(agent) is not Agent:
+            raise ValueError(f"BatchTrainer only trains plain Q-learning agents, not {type(agent).__name__}")
+        self.agent = agent
+        self.maze = maze
+        self.num_agents = num_agents
+        self.num_episodes = num_episodes
+        self.max_steps = max_steps
+        self.clock_tick = clock_tick
+        self.render_every = render_every
+        self.rng = np.random.default_rng(seed)
+        self.evaluator = evaluator
+        # Q-tables: dimensions = (num_agents, rows, cols, number of actions)
+        # All agents start from the agent's current (possibly resumed) Q-table
+        self.q_tables = np.zeros((num_agents,) + agent.q_table.shape, dtype=agent.q_table.dtype)
+        self.q_tables[:] = agent.q_table
+        self.episode_steps = np.zeros(num_agents, dtype=np.int64)
+        self.episode_solved = np.zeros(num_agents, dtype=bool)
+        self.episode_rewards = np.zeros(num_agents)
+        self.metrics = metrics
+
+    def _render(self, screen, clock, position):
+        handle_quit_events()
+        pygame.display.update(self.maze.draw(screen, position))
+        clock.tick(self.clock_tick)
+
+    def train(self, screen=None, clock=None):
+        print(f"Training {self.num_agents} agents in lockstep...")
+        alpha, gamma, epsilon = self.agent.alpha, self.agent.gamma, self.agent.epsilon
+        # One metrics row per lockstep episode: mean reward and the steps of all agents
+        metrics = self.metrics or default_metrics("Maze batch", ("solved", "success_rate", "path_ratio"))
+        for episode in range(self.num_episodes):
+            render = screen is not None and self.render_every > 0 and episode % self.render_every == 0
+            positions = np.tile(self.agent.start_pos, (self.num_agents, 1))
+            active = np.arange(self.num_agents)
+            self.episode_steps[:] = self.max_steps
+            self.episode_solved[:] = False
+            self.episode_rewards[:] = 0.0
+            for step in range(self.max_steps):
+                pos = positions[active]
+                r, c = pos[:, 0], pos[:, 1]
+                q_rows = self.q_tables[active, r, c]
+                # Batched epsilon-greedy policy
+                explore = self.rng.random(len(active)) < epsilon
+                actions = np.where(explore,
+                                   self.rng.integers(0, 4, len(active)),
+                                   np.argmax(q_rows, axis=1))
+                next_pos, rewards, done = self.maze.step_batch(pos, actions)
+
+                # Batched Q-learning update rule
+                best_next = np.max(self.q_tables[active, next_pos[:, 0], next_pos[:, 1]], axis=1)
+                current_q = q_rows[np.arange(len(active)), actions]
+                self.q_tables[active, r, c, actions] = current_q + alpha * (rewards + gamma * best_next - current_q)
+                positions[active] = next_pos
+                self.episode_rewards[active] += rewards
+
+                if render and active[0] == 0:
+                    self._render(screen, clock, positions[0])
+
+                # Finished agents drop out of the batch until the next episode
+                self.episode_steps[active[done]] = step + 1
+                self.episode_solved[active[done]] = True
+                active = active[~done]
+                if len(active) == 0:
+                    break
+
+            greedy = {}
+            if self.evaluator is not None:
+                result = self.evaluator.evaluate(self.q_tables)
+                greedy = {"success_rate": result["success_rate"].mean(), "path_ratio": result["path_ratio"].mean()}
+            log_episode(metrics, self.episode_rewards.mean(), int(self.episode_steps.sum()), epsilon,
+                        solved=np.count_nonzero(self.episode_solved) / self.num_agents, **greedy)
+        metrics.close()
+
+        # Hand the best performing Q-table back to the agent for demonstration
+        if self.evaluator is not None and self.num_episodes > 0:
+            # Highest greedy success rate, ties broken by the shortest paths
+            best = int(np.lexsort((result['path_ratio'], -result['success_rate']))[0])
+        else:
+            best = int(np.argmin(self.episode_steps))
+        self.agent.q_table = self.q_tables[best].copy()
+        self.agent.episodes_trained += self.num_episodes
+        print(f"Training completed. Using agent {best} ({self.episode_steps[best]} steps in the last episode).")
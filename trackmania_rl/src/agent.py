@@ -2,8 +2,9 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import random
+import time
 import numpy as np
-from collections import deque
+from replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
 
 class DQNAgent:
     """A simple Deep Q-Network (DQN) agent."""
@@ -12,12 +13,30 @@ class DQNAgent:
         # Basic parameters and replay memory
         self.state_size = state_size
         self.action_size = action_size
-        self.memory = deque(maxlen=2000)
+        # Preallocated ring buffer; memory_dtype (e.g. float16) shrinks the stored states
+        memory_size = config.get('memory_size', 2000)
+        memory_dtype = np.dtype(config.get('memory_dtype', 'float32'))
+        memory_seed = config.get('seed')
+        # Prioritized replay samples transitions by TD error, so rare checkpoint crossings get replayed more
+        self.prioritized_replay = config.get('prioritized_replay', False)
+        if self.prioritized_replay:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_size, memory_dtype, memory_seed,
+                                                  alpha=config.get('per_alpha', 0.6),
+                                                  beta=config.get('per_beta', 0.4),
+                                                  beta_steps=config.get('per_beta_steps', 100_000))
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size, memory_dtype, memory_seed)
         self.gamma = config.get('gamma', 0.95)       # Discount factor
         self.epsilon = config.get('epsilon', 1.0)      # Exploration rate
         self.epsilon_min = config.get('epsilon_min', 0.01)
         self.epsilon_decay = config.get('epsilon_decay', 0.995)
         self.learning_rate = config.get('learning_rate', 0.001)
+        # Replay: one stacked minibatch per gradient step (the old per-transition loop is kept for comparison)
+        self.batched_replay = config.get('batched_replay', True)
+        self.gradient_steps = config.get('gradient_steps', 1)           # Gradient steps per replay() call
+        self.target_update_every = config.get('target_update_every', 100)  # Gradient steps between target syncs
+        if self.prioritized_replay and not self.batched_replay:
+            raise ValueError("prioritized_replay needs batched_replay")
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         
         # Build model, optimizer, and loss function
@@ -25,6 +44,14 @@ class DQNAgent:
         self.optimizer = optim.Adam(self.model.parameters(), lr=self.learning_rate)
         self.criterion = nn.MSELoss()
 
+        # Target network for the bootstrap targets, synced every target_update_every gradient steps
+        self.target_model = self._build_model().to(self.device)
+        self.update_target()
+
+        # Gradient steps taken and seconds spent in replay(), for updates/sec reporting
+        self.updates = 0
+        self.update_time = 0.0
+
     def _build_model(self):
         """Builds a simple neural network model."""
         return nn.Sequential(
@@ -44,19 +71,85 @@ class DQNAgent:
             q_values = self.model(state_tensor)
         return torch.argmax(q_values, dim=1).item()
 
+    def act_batch(self, states):
+        """Epsilon-greedy actions for a (batch, state_size) array of states, with one forward pass."""
+        states = torch.as_tensor(np.asarray(states, dtype=np.float32), device=self.device)
+        with torch.no_grad():
+            greedy = torch.argmax(self.model(states), dim=1).cpu().numpy()
+        explore = np.random.rand(len(greedy)) <= self.epsilon
+        return np.where(explore, np.random.randint(self.action_size, size=len(greedy)), greedy)
+
     def remember(self, state, action, reward, next_state, done):
         """Store an experience tuple for replay."""
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def update_target(self):
+        """Copy the online network's weights into the target network."""
+        self.target_model.load_state_dict(self.model.state_dict())
+        self.target_model.eval()
+
+    def updates_per_second(self):
+        return self.updates / self.update_time if self.update_time else 0.0
 
     def replay(self, batch_size):
-        """Train the network using randomly sampled experiences."""
+        """
+        Train the network using randomly sampled experiences. With batched_replay,
+        takes gradient_steps gradient steps, each on a freshly sampled minibatch;
+        otherwise falls back to one gradient step per sampled transition.
+        Returns the mean loss, or None if memory is too small.
+        """
         if len(self.memory) < batch_size:
-            return
+            return None
+
+        start = time.perf_counter()
+        if self.batched_replay:
+            losses = [self._replay_batch(*self.memory.sample(batch_size)) for _ in range(self.gradient_steps)]
+            loss = sum(losses) / len(losses)
+        else:
+            loss = self._replay_per_sample(*self.memory.sample(batch_size))
+        self.update_time += time.perf_counter() - start
+
+        # Decay the exploration rate
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
+        return loss
+
+    def _replay_batch(self, states, actions, rewards, next_states, dones, weights=None, indices=None):
+        # One forward pass per network over the whole minibatch and one optimizer step
+        states = states.to(self.device, torch.float32)
+        next_states = next_states.to(self.device, torch.float32)
+        actions = actions.to(self.device)
+        rewards = rewards.to(self.device)
+        dones = dones.to(self.device, torch.float32)
+
+        q_values = self.model(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        with torch.no_grad():
+            next_q = self.target_model(next_states).max(dim=1).values
+            targets = rewards + self.gamma * next_q * (1.0 - dones)
+
+        self.optimizer.zero_grad()
+        if weights is None:
+            loss = self.criterion(q_values, targets)
+        else:
+            # Importance-sampling weights undo the bias of prioritized sampling
+            td_errors = targets - q_values
+            loss = (weights.to(self.device) * td_errors.pow(2)).mean()
+            self.memory.update_priorities(indices, td_errors.detach().cpu().numpy())
+        loss.backward()
+        self.optimizer.step()
 
-        minibatch = random.sample(self.memory, batch_size)
-        for state, action, reward, next_state, done in minibatch:
-            state_tensor = torch.FloatTensor(state).to(self.device)
-            next_state_tensor = torch.FloatTensor(next_state).to(self.device)
+        self.updates += 1
+        if self.updates % self.target_update_every == 0:
+            self.update_target()
+        return loss.item()
+
+    def _replay_per_sample(self, states, actions, rewards, next_states, dones):
+        # Original update: a forward, backward and optimizer step for every transition
+        total_loss = 0.0
+        for state, action, reward, next_state, done in zip(states, actions.tolist(), rewards.tolist(),
+                                                           next_states, dones.tolist()):
+            state_tensor = state.to(self.device, torch.float32)
+            next_state_tensor = next_state.to(self.device, torch.float32)
             target = reward
             if not done:
                 with torch.no_grad():
@@ -69,15 +162,15 @@ class DQNAgent:
             loss = self.criterion(target_f, target_val)
             loss.backward()
             self.optimizer.step()
-
-        # Decay the exploration rate
-        if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
+            total_loss += loss.item()
+            self.updates += 1
+        return total_loss / len(actions)
 
     def save_checkpoint(self, filepath):
         """Save the model and optimizer state for later use."""
         checkpoint = {
             'model_state_dict': self.model.state_dict(),
+            'target_model_state_dict': self.target_model.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
             'epsilon': self.epsilon
         }
@@ -88,6 +181,8 @@ class DQNAgent:
         """Load the model and optimizer state."""
         checkpoint = torch.load(filepath)
         self.model.load_state_dict(checkpoint['model_state_dict'])
+        # Older checkpoints have no target network: start it from the loaded weights
+        self.target_model.load_state_dict(checkpoint.get('target_model_state_dict', checkpoint['model_state_dict']))
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         self.epsilon = checkpoint.get('epsilon', self.epsilon)
         print(f"Checkpoint loaded from {filepath}")
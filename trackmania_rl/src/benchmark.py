@@ -0,0 +1,218 @@
+# benchmark.py
+import random
+import sys
+import time
+from collections import deque
+import numpy as np
+import torch
+from agent import DQNAgent
+from replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
+from trackmania_pygame_env import TrackmaniaPygameEnv
+from trackmania_vec_env import TrackmaniaVecEnv
+
+STATE_SIZE = 4
+ACTION_SIZE = 4
+
+def random_transitions(num_transitions, seed=0):
+    # Random transitions shaped like TrackmaniaPygameEnv's (x, y, speed, angle) states
+    rng = np.random.default_rng(seed)
+    states = rng.random((num_transitions, STATE_SIZE), dtype=np.float32)
+    actions = rng.integers(ACTION_SIZE, size=num_transitions)
+    rewards = rng.normal(size=num_transitions).astype(np.float32)
+    next_states = rng.random((num_transitions, STATE_SIZE), dtype=np.float32)
+    dones = rng.random(num_transitions) < 0.01
+    return states, actions, rewards, next_states, dones
+
+def fill_memory(agent, num_transitions, seed=0):
+    agent.memory.add_batch(*random_transitions(num_transitions, seed))
+
+def benchmark_replay(num_calls=200, batch_size=32, gradient_steps=(1, 4)):
+    """
+    Throughput of DQNAgent.replay(): the original per-transition loop against the
+    batched update with a target network, for a few gradient_steps settings.
+    Reports replay() calls/s (one per env step in train_agent), gradient updates/s
+    and transitions/s trained on.
+    """
+    setups = [("per-sample", {'batched_replay': False})]
+    setups += [(f"batched x{steps}", {'batched_replay': True, 'gradient_steps': steps}) for steps in gradient_steps]
+    for name, agent_config in setups:
+        agent = DQNAgent(STATE_SIZE, ACTION_SIZE, agent_config)
+        fill_memory(agent, agent.memory.capacity)
+        agent.replay(batch_size)  # Warm-up
+        agent.updates, agent.update_time = 0, 0.0
+        start = time.perf_counter()
+        for _ in range(num_calls):
+            agent.replay(batch_size)
+        elapsed = time.perf_counter() - start
+        transitions = num_calls * batch_size * (agent.gradient_steps if agent.batched_replay else 1)
+        print(f"{name:>14}: {num_calls / elapsed:8.1f} replay calls/s, "
+              f"{agent.updates_per_second():8.1f} updates/s, {transitions / elapsed:9.0f} transitions/s")
+
+def _deque_sample(memory, batch_size):
+    # What replay() used to do: random.sample over tuples, then stack into tensors
+    states, actions, rewards, next_states, dones = zip(*random.sample(memory, batch_size))
+    return (torch.as_tensor(np.array(states)), torch.as_tensor(actions), torch.as_tensor(rewards),
+            torch.as_tensor(np.array(next_states)), torch.as_tensor(dones))
+
+def benchmark_replay_memory(capacities=(2000, 100_000, 1_000_000), batch_size=32, num_samples=2000):
+    """
+    Bytes per stored transition and minibatch sampling rate of the old deque of
+    tuples against ReplayBuffer (float32 and float16 states), per capacity.
+    """
+    for capacity in capacities:
+        transitions = random_transitions(capacity)
+        memory = deque(maxlen=capacity)
+        for row in zip(*transitions):
+            memory.append(row)
+        # Deque slot + tuple + its five objects (two state arrays, three scalars)
+        state, action, reward, next_state, done = memory[0]
+        tuple_bytes = (8 + sys.getsizeof(memory[0]) + state.nbytes + next_state.nbytes + 2 * sys.getsizeof(state)
+                       + sys.getsizeof(action) + sys.getsizeof(reward) + sys.getsizeof(done))
+        start = time.perf_counter()
+        for _ in range(num_samples):
+            _deque_sample(memory, batch_size)
+        rate = num_samples / (time.perf_counter() - start)
+        print(f"capacity {capacity:>9}: deque         {tuple_bytes:5.0f} B/transition, {rate:9.0f} batches/s")
+        del memory
+
+        for dtype in (np.float32, np.float16):
+            buffer = ReplayBuffer(capacity, STATE_SIZE, dtype)
+            buffer.add_batch(*transitions)
+            start = time.perf_counter()
+            for _ in range(num_samples):
+                buffer.sample(batch_size)
+            rate = num_samples / (time.perf_counter() - start)
+            print(f"capacity {capacity:>9}: ring {np.dtype(dtype).name:>8} {buffer.nbytes / capacity:5.0f} B/transition, "
+                  f"{rate:9.0f} batches/s")
+
+def benchmark_prioritized_sampling(capacity=1_000_000, batch_size=32, num_samples=2000):
+    """
+    Minibatches/s at the given capacity for uniform sampling against prioritized
+    sampling including the sum-tree priority update that follows each batch.
+    """
+    transitions = random_transitions(capacity)
+    rng = np.random.default_rng(0)
+    for name, buffer in (("uniform", ReplayBuffer(capacity, STATE_SIZE)),
+                         ("prioritized", PrioritizedReplayBuffer(capacity, STATE_SIZE))):
+        buffer.add_batch(*transitions)
+        prioritized = isinstance(buffer, PrioritizedReplayBuffer)
+        start = time.perf_counter()
+        for _ in range(num_samples):
+            batch = buffer.sample(batch_size)
+            if prioritized:
+                buffer.update_priorities(batch[-1], rng.normal(size=batch_size))
+        rate = num_samples / (time.perf_counter() - start)
+        print(f"{name:>11} @ {capacity}: {rate:8.0f} batches/s, {rate * batch_size:10.0f} transitions/s")
+
+def episodes_to_first_finish(agent_config, num_waypoints=None, max_episodes=300, max_steps=200, batch_size=32, seed=0):
+    # Train without rendering until the car first crosses every checkpoint; None if it never does
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    env = TrackmaniaPygameEnv({"headless": True})
+    if num_waypoints is not None:
+        env.track_points = env.track_points[:num_waypoints]
+    agent = DQNAgent(STATE_SIZE, ACTION_SIZE, dict(agent_config, seed=seed))
+    for episode in range(1, max_episodes + 1):
+        state = env.reset()
+        for step in range(max_steps):
+            action = agent.act(state)
+            next_state, reward, done, _ = env.step(action)
+            agent.remember(state, action, reward, next_state, done)
+            state = next_state
+            if done:
+                if env.current_waypoint_index >= len(env.track_points):
+                    return episode
+                break
+            agent.replay(batch_size)
+    return None
+
+def benchmark_prioritized_replay(num_waypoints=3, max_episodes=300, seeds=range(6)):
+    """
+    Episodes until the first finish with uniform and with prioritized replay, per
+    seed. Defaults to the first num_waypoints waypoints of the track: within a few
+    hundred episodes neither mode gets past the second checkpoint of the full one.
+    """
+    for name, agent_config in (("uniform", {}), ("prioritized", {'prioritized_replay': True})):
+        results = [episodes_to_first_finish(agent_config, num_waypoints, max_episodes, seed=seed) for seed in seeds]
+        print(f"{name:>11}: episodes to first finish {results} (None: not within {max_episodes})")
+
+def benchmark_vec_env(num_cars=(1, 64, 1024), num_steps=20_000, batch_size=32):
+    """
+    Transitions/s from the single-car env and from TrackmaniaVecEnv at several
+    car counts, with random actions (env only) and feeding a DQNAgent (batched
+    action selection, add_batch and one replay() call per batched step).
+    """
+    rng = np.random.default_rng(0)
+    env = TrackmaniaPygameEnv({"headless": True})
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        _, _, done, _ = env.step(int(rng.integers(ACTION_SIZE)))
+        if done:
+            env.reset()
+    print(f"{'single car':>16}: {num_steps / (time.perf_counter() - start):10.0f} transitions/s (env only)")
+
+    for cars in num_cars:
+        env = TrackmaniaVecEnv({"headless": True}, cars)
+        steps = max(1, num_steps // cars)
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(rng.integers(ACTION_SIZE, size=cars))
+        env_rate = steps * cars / (time.perf_counter() - start)
+
+        agent = DQNAgent(STATE_SIZE, ACTION_SIZE, {'memory_size': 100_000})
+        states = env.reset()
+        start = time.perf_counter()
+        for _ in range(steps):
+            actions = agent.act_batch(states)
+            next_states, rewards, dones, info = env.step(actions)
+            agent.memory.add_batch(states, actions, rewards, info["next_states"], info["terminated"])
+            agent.replay(batch_size)
+            states = next_states
+        train_rate = steps * cars / (time.perf_counter() - start)
+        print(f"{f'{cars} cars':>16}: {env_rate:10.0f} transitions/s (env only), {train_rate:10.0f} with DQN updates")
+
+def wavy_track(num_waypoints):
+    # A sine-shaped track across the screen with the given number of waypoints
+    x = np.linspace(100, 700, num_waypoints)
+    return list(zip(x.tolist(), (300 + 100 * np.sin(x / 80)).tolist()))
+
+def benchmark_track_geometry(sizes=(7, 100, 1000, 5000), num_steps=5000, num_cars=1024):
+    """
+    Geometry build time and step time of the single-car env and of a
+    TrackmaniaVecEnv with num_cars cars as the track grows to thousands of waypoints.
+    """
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        env = TrackmaniaPygameEnv({"headless": True})
+        env.track_points = wavy_track(size)
+        start = time.perf_counter()
+        env.geometry
+        build_ms = (time.perf_counter() - start) * 1000
+        env.reset()
+        start = time.perf_counter()
+        for _ in range(num_steps):
+            _, _, done, _ = env.step(int(rng.integers(ACTION_SIZE)))
+            if done:
+                env.reset()
+        step_us = (time.perf_counter() - start) / num_steps * 1e6
+
+        vec_env = TrackmaniaVecEnv({"headless": True}, num_cars)
+        vec_env.track_points = wavy_track(size)
+        vec_env.reset()
+        vec_steps = max(1, num_steps // 50)
+        start = time.perf_counter()
+        for _ in range(vec_steps):
+            vec_env.step(rng.integers(ACTION_SIZE, size=num_cars))
+        vec_ms = (time.perf_counter() - start) / vec_steps * 1000
+        print(f"{size:>5} waypoints: build {build_ms:7.1f} ms, single car {step_us:6.1f} us/step, "
+              f"{num_cars} cars {vec_ms:6.2f} ms/step")
+
+if __name__ == "__main__":
+    benchmark_replay()
+    benchmark_replay_memory()
+    benchmark_prioritized_sampling()
+    benchmark_prioritized_replay()
+    benchmark_vec_env()
+    benchmark_track_geometry()
@@ -0,0 +1,202 @@
+# replay_buffer.py
+import numpy as np
+import torch
+
+class ReplayBuffer:
+    """
+    Replay memory backed by preallocated contiguous arrays instead of a deque of
+    tuples. Transitions are written into a ring: once capacity is reached the
+    oldest ones are overwritten. sample() draws indices with one vectorized call,
+    gathers them into reusable batch arrays and returns torch.from_numpy views of
+    those, so no per-transition tensors are built. state_dtype (e.g. float16)
+    trades state precision for memory on very large buffers.
+    """
+    def __init__(self, capacity, state_size, state_dtype=np.float32, seed=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.states = np.zeros((capacity, state_size), dtype=state_dtype)
+        self.next_states = np.zeros((capacity, state_size), dtype=state_dtype)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.position = 0       # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+        self._batch = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.states, self.next_states, self.actions, self.rewards, self.dones))
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition, overwriting the oldest when full."""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions (arrays with one row each) in a single ring write."""
+        count = len(actions)
+        if count > self.capacity:
+            # Only the newest capacity transitions would survive anyway
+            states, actions, rewards, next_states, dones = (np.asarray(array)[-self.capacity:] for array in
+                                                            (states, actions, rewards, next_states, dones))
+            count = self.capacity
+        index = (self.position + np.arange(count)) % self.capacity
+        self.states[index] = states
+        self.actions[index] = actions
+        self.rewards[index] = rewards
+        self.next_states[index] = next_states
+        self.dones[index] = dones
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        return index
+
+    def sample_indices(self, batch_size):
+        # Uniform indices over the stored transitions (with replacement)
+        return self.rng.integers(0, self.size, size=batch_size)
+
+    def gather(self, index):
+        """
+        (states, actions, rewards, next_states, dones) tensors for the given indices.
+        The tensors share memory with batch arrays that are reused by the next
+        gather() of the same size, so consume them (or copy) before sampling again.
+        """
+        batch = self._batch
+        if batch is None or len(batch[1]) != len(index):
+            batch = self._batch = (np.empty((len(index), self.state_size), dtype=self.states.dtype),
+                                   np.empty(len(index), dtype=np.int64),
+                                   np.empty(len(index), dtype=np.float32),
+                                   np.empty((len(index), self.state_size), dtype=self.states.dtype),
+                                   np.empty(len(index), dtype=bool))
+        for source, out in zip((self.states, self.actions, self.rewards, self.next_states, self.dones), batch):
+            np.take(source, index, axis=0, out=out)
+        return tuple(torch.from_numpy(out) for out in batch)
+
+    def sample(self, batch_size):
+        """A uniformly sampled batch as tensor views, see gather()."""
+        return self.gather(self.sample_indices(batch_size))
+
+class SumTree:
+    """
+    Array-based binary sum tree over capacity priorities. Leaves sit at
+    [size, size + capacity) of one float64 array (size is the next power of two)
+    and every inner node holds the sum of its children, so the root is the total.
+    Updates and proportional lookups walk one root-to-leaf path: O(log N), done
+    level by level for a whole batch of indices at once.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.size = 1 << self.depth
+        self.tree = np.zeros(2 * self.size)
+        # View with row k = (left child, right child) of node k, so one gather reads both
+        self._children = self.tree.reshape(-1, 2)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def priorities(self, index):
+        return self.tree[np.asarray(index) + self.size]
+
+    def update(self, index, priorities):
+        """Set the priorities of the given leaves and re-sum their ancestors."""
+        tree = self.tree
+        if np.isscalar(index):
+            # Single transitions (DQNAgent.remember) skip the array overhead
+            node = int(index) + self.size
+            tree[node] = priorities
+            while node > 1:
+                node //= 2
+                tree[node] = tree[2 * node] + tree[2 * node + 1]
+            return
+        node = np.asarray(index) + self.size
+        tree[node] = priorities
+        for _ in range(self.depth):
+            # Duplicate parents just get the same sum written twice
+            node >>= 1
+            children = self._children[node]
+            tree[node] = children[:, 0] + children[:, 1]
+
+    def find(self, values):
+        """Leaf index for each value in [0, total): the leaf whose cumulative priority range contains it."""
+        values = np.array(values, dtype=np.float64)
+        node = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            children = self._children[node]
+            # Going right needs a non-empty right subtree, so rounding never lands on an empty leaf
+            go_right = (values >= children[:, 0]) & (children[:, 1] > 0)
+            values -= children[:, 0] * go_right
+            node = 2 * node + go_right
+        return node - self.size
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized replay (Schaul et al.) on top of ReplayBuffer.
+    Transition i is sampled with probability p_i^alpha / sum_k p_k^alpha, where
+    p_i is its last absolute TD error plus epsilon; new transitions get the
+    largest priority seen so far, so they are replayed soon after arriving. sample()
+    also returns importance-sampling weights (N * P(i))^-beta, normalised by
+    their batch maximum, with beta annealed linearly to 1 over beta_steps
+    samples, and the sampled indices for update_priorities().
+    """
+    def __init__(self, capacity, state_size, state_dtype=np.float32, seed=None,
+                 alpha=0.6, beta=0.4, beta_steps=100_000, epsilon=1e-5):
+        super().__init__(capacity, state_size, state_dtype, seed)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta_steps = beta_steps
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.samples = 0
+        self._weights = None
+
+    @property
+    def beta(self):
+        return min(1.0, self.beta_start + (1.0 - self.beta_start) * self.samples / self.beta_steps)
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        super().add(state, action, reward, next_state, done)
+        self.tree.update(i, self.max_priority ** self.alpha)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        index = super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(index, np.full(len(index), self.max_priority ** self.alpha))
+        return index
+
+    def sample_indices(self, batch_size):
+        # Stratified: one uniform draw from each of batch_size equal slices of the total priority
+        bounds = (np.arange(batch_size) + self.rng.random(batch_size)) * (self.tree.total / batch_size)
+        return np.minimum(self.tree.find(bounds), self.size - 1)
+
+    def sample(self, batch_size):
+        """
+        (states, actions, rewards, next_states, dones, weights, indices): the
+        tensor views of gather(), the float32 importance-sampling weights as a
+        tensor and the sampled buffer indices as an array.
+        """
+        index = self.sample_indices(batch_size)
+        probabilities = self.tree.priorities(index) / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        if self._weights is None or len(self._weights) != batch_size:
+            self._weights = np.empty(batch_size, dtype=np.float32)
+        np.divide(weights, weights.max(), out=self._weights, casting="unsafe")
+        self.samples += 1
+        return self.gather(index) + (torch.from_numpy(self._weights), index)
+
+    def update_priorities(self, index, td_errors):
+        """New priorities for sampled transitions from the absolute TD errors of their update."""
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(index, priorities ** self.alpha)
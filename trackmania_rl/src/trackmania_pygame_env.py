@@ -1,6 +1,7 @@
 import pygame
 import math
 import numpy as np
+from track_geometry import TrackGeometry
 
 class TrackmaniaPygameEnv:
     """
@@ -10,12 +11,21 @@ class TrackmaniaPygameEnv:
     The reward only considers progress toward the next checkpoint and a bonus for hitting it.
     """
     def __init__(self, config):
-        pygame.init()
         self.screen_width = config.get("screen_width", 800)
         self.screen_height = config.get("screen_height", 600)
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Trackmania RL - Simplified Training")
-        self.clock = pygame.time.Clock()
+        # Headless mode opens no window and has no frame clock: render() is a no-op and
+        # the simulation runs as fast as the CPU allows (e.g. on display-less machines).
+        self.headless = config.get("headless", False)
+        # Frame rate cap while rendering; 0 renders without waiting.
+        self.render_fps = config.get("render_fps", 60)
+        if self.headless:
+            self.screen = None
+            self.clock = None
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+            pygame.display.set_caption("Trackmania RL - Simplified Training")
+            self.clock = pygame.time.Clock()
 
         # Define a basic track as a list of waypoints (centerline)
         self.track_points = [
@@ -29,6 +39,16 @@ class TrackmaniaPygameEnv:
         ]
         # off_track_threshold defines half the track width (and is used for checkpoint detection)
         self.off_track_threshold = config.get("off_track_threshold", 50)
+        # Resolution (pixels per cell) of the distance field behind the off-track test
+        self.distance_field_cell = config.get("distance_field_cell", 1.0)
+
+        # Render cache: fonts and the car sprite are built once, the track is baked on first render.
+        if not self.headless:
+            self.font = pygame.font.SysFont("Arial", 18)
+            self.car_surface = pygame.Surface((40, 20), pygame.SRCALPHA)
+            self.car_surface.fill((0, 0, 255))
+        self._rotated_cars = {}
+        self._dirty_rects = []
 
         # Reward parameters for the simplified training phase.
         self.step_penalty = config.get("step_penalty", -0.1)
@@ -42,6 +62,34 @@ class TrackmaniaPygameEnv:
 
         self.reset()
 
+    @property
+    def track_points(self):
+        return self._track_points
+
+    @track_points.setter
+    def track_points(self, points):
+        self._track_points = points
+        self._background = None
+        self._geometry = None
+
+    @property
+    def off_track_threshold(self):
+        return self._off_track_threshold
+
+    @off_track_threshold.setter
+    def off_track_threshold(self, value):
+        # Track width and checkpoint lines depend on the threshold, so re-bake the background and geometry.
+        self._off_track_threshold = value
+        self._background = None
+        self._geometry = None
+
+    @property
+    def geometry(self):
+        # Checkpoint lines and distance field, rebuilt on first use after the track or threshold changed
+        if self._geometry is None:
+            self._geometry = TrackGeometry(self.track_points, self.off_track_threshold, self.distance_field_cell)
+        return self._geometry
+
     def reset(self):
         # Start at the first waypoint with fixed speed if in constant speed mode.
         speed = self.constant_speed_value if self.constant_speed else 0
@@ -79,53 +127,8 @@ class TrackmaniaPygameEnv:
         return False
 
     def _get_checkpoint_line(self, waypoint, idx):
-        # Compute the local tangent direction using neighboring waypoints.
-        if idx == 0:
-            dx = self.track_points[1][0] - waypoint[0]
-            dy = self.track_points[1][1] - waypoint[1]
-        elif idx == len(self.track_points) - 1:
-            dx = waypoint[0] - self.track_points[idx - 1][0]
-            dy = waypoint[1] - self.track_points[idx - 1][1]
-        else:
-            dx1 = waypoint[0] - self.track_points[idx - 1][0]
-            dy1 = waypoint[1] - self.track_points[idx - 1][1]
-            dx2 = self.track_points[idx + 1][0] - waypoint[0]
-            dy2 = self.track_points[idx + 1][1] - waypoint[1]
-            dx = (dx1 + dx2) / 2
-            dy = (dy1 + dy2) / 2
-
-        mag = math.hypot(dx, dy)
-        if mag == 0:
-            norm_dx, norm_dy = 0, 0
-        else:
-            norm_dx, norm_dy = dx / mag, dy / mag
-
-        # The checkpoint line is perpendicular to the tangent.
-        perp_x = -norm_dy
-        perp_y = norm_dx
-        half_width = self.off_track_threshold
-        start_point = (waypoint[0] + perp_x * half_width, waypoint[1] + perp_y * half_width)
-        end_point = (waypoint[0] - perp_x * half_width, waypoint[1] - perp_y * half_width)
-        return start_point, end_point
-
-    def _min_distance_to_track(self, x, y):
-        # Compute the minimum distance from (x, y) to the track centerline.
-        min_dist = float('inf')
-        for i in range(len(self.track_points) - 1):
-            x1, y1 = self.track_points[i]
-            x2, y2 = self.track_points[i+1]
-            dx = x2 - x1
-            dy = y2 - y1
-            if dx == 0 and dy == 0:
-                dist = math.hypot(x - x1, y - y1)
-            else:
-                t = max(0, min(1, ((x - x1) * dx + (y - y1) * dy) / (dx*dx + dy*dy)))
-                nearest_x = x1 + t * dx
-                nearest_y = y1 + t * dy
-                dist = math.hypot(x - nearest_x, y - nearest_y)
-            if dist < min_dist:
-                min_dist = dist
-        return min_dist
+        # Checkpoint lines run perpendicular to the local tangent; they are precomputed per track.
+        return self.geometry.checkpoint_line(idx)
 
     def step(self, action):
         old_state = self.state.copy()
@@ -176,7 +179,7 @@ class TrackmaniaPygameEnv:
             self.done = True
 
         # End episode if off track or off-screen.
-        if self._min_distance_to_track(x, y) > self.off_track_threshold:
+        if self.geometry.is_off_track(x, y):
             self.done = True
             reward = -10
         if x < 0 or x > self.screen_width or y < 0 or y > self.screen_height:
@@ -185,47 +188,69 @@ class TrackmaniaPygameEnv:
 
         return self.state, reward, self.done, {}
 
-    def render(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        self.screen.fill((144, 238, 144))
+    def _build_background(self):
+        background = pygame.Surface((self.screen_width, self.screen_height))
+        background.fill((144, 238, 144))
         # Draw the track as a thick line.
         track_width = int(self.off_track_threshold * 2)
         if len(self.track_points) >= 2:
-            pygame.draw.lines(self.screen, (50, 50, 50), False, self.track_points, track_width)
+            pygame.draw.lines(background, (50, 50, 50), False, self.track_points, track_width)
 
         # Draw perpendicular checkpoint lines.
         for i, point in enumerate(self.track_points):
             cp_start, cp_end = self._get_checkpoint_line(point, i)
-            pygame.draw.line(self.screen, (255, 165, 0),
+            pygame.draw.line(background, (255, 165, 0),
                              (int(cp_start[0]), int(cp_start[1])),
                              (int(cp_end[0]), int(cp_end[1])), 3)
-            pygame.draw.circle(self.screen, (255, 0, 0), (int(point[0]), int(point[1])), 5)
+            pygame.draw.circle(background, (255, 0, 0), (int(point[0]), int(point[1])), 5)
+        return background
+
+    def _rotated_car(self, angle):
+        # Steering changes the angle in fixed increments, so rotations are cached per angle.
+        key = round(float(angle)) % 360
+        if key not in self._rotated_cars:
+            self._rotated_cars[key] = pygame.transform.rotate(self.car_surface, -key)
+        return self._rotated_cars[key]
+
+    def render(self):
+        if self.headless:
+            return
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+
+        # Restore the static background where dynamic parts were drawn last frame.
+        if self._background is None:
+            self._background = self._build_background()
+            self.screen.blit(self._background, (0, 0))
+            previous = [self.screen.get_rect()]
+        else:
+            previous = self._dirty_rects
+            for rect in previous:
+                self.screen.blit(self._background, rect, rect)
 
+        dirty = []
         # Highlight the current checkpoint.
         if self.current_waypoint_index < len(self.track_points):
             target = self.track_points[self.current_waypoint_index]
-            pygame.draw.circle(self.screen, (0, 255, 0), (int(target[0]), int(target[1])), 8, 2)
+            dirty.append(pygame.draw.circle(self.screen, (0, 255, 0), (int(target[0]), int(target[1])), 8, 2))
 
         # Draw the car.
         x, y, speed, angle = self.state
-        car_width, car_height = 40, 20
-        car_surface = pygame.Surface((car_width, car_height), pygame.SRCALPHA)
-        car_surface.fill((0, 0, 255))
-        rotated_car = pygame.transform.rotate(car_surface, -angle)
+        rotated_car = self._rotated_car(angle)
         car_rect = rotated_car.get_rect(center=(int(x), int(y)))
-        self.screen.blit(rotated_car, car_rect.topleft)
+        dirty.append(self.screen.blit(rotated_car, car_rect.topleft))
 
         # Overlay status.
-        font = pygame.font.SysFont("Arial", 18)
         stats_text = f"Speed: {speed:.1f}  Angle: {angle:.1f}"
-        text_surface = font.render(stats_text, True, (0, 0, 0))
-        self.screen.blit(text_surface, (10, 10))
+        text_surface = self.font.render(stats_text, True, (0, 0, 0))
+        dirty.append(self.screen.blit(text_surface, (10, 10)))
 
-        pygame.display.flip()
-        self.clock.tick(60)
+        pygame.display.update(previous + dirty)
+        self._dirty_rects = dirty
+        if self.render_fps:
+            self.clock.tick(self.render_fps)
 
     def close(self):
-        pygame.quit()
+        if not self.headless:
+            pygame.quit()
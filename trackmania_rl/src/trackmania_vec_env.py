@@ -0,0 +1,151 @@
+# trackmania_vec_env.py
+import numpy as np
+import pygame
+from trackmania_pygame_env import TrackmaniaPygameEnv
+
+class TrackmaniaVecEnv(TrackmaniaPygameEnv):
+    """
+    num_cars independent cars on the same track, stepped together. Positions,
+    speeds, angles, checkpoint indices and progress distances live in NumPy
+    arrays, and the checkpoint crossing, off-track (distance field lookup, see
+    TrackGeometry) and off-screen tests run as array operations over all cars,
+    with the same rewards as TrackmaniaPygameEnv.
+    A car whose episode ends (or runs max_episode_steps) is reset on the spot.
+    """
+    def __init__(self, config, num_cars=None):
+        self.num_cars = num_cars or config.get("num_cars", 64)
+        self.max_episode_steps = config.get("max_steps", 200)
+        self._cars = np.arange(self.num_cars)
+        super().__init__(config)
+
+    def _reset_cars(self, cars):
+        points = self.geometry.points
+        speed = self.constant_speed_value if self.constant_speed else 0
+        self.state[cars] = [self.track_points[0][0], self.track_points[0][1], speed, 0]
+        self.waypoint_index[cars] = 1
+        self.episode_reward[cars] = 0.0
+        self.episode_steps[cars] = 0
+        if len(self.track_points) > 1:
+            self.prev_distance[cars] = np.hypot(*(points[1] - points[0]))
+        else:
+            self.prev_distance[cars] = 0.0
+
+    def reset(self):
+        """Reset every car; returns the (num_cars, 4) state array."""
+        self.state = np.zeros((self.num_cars, 4), dtype=np.float32)
+        self.waypoint_index = np.ones(self.num_cars, dtype=np.int64)
+        self.prev_distance = np.zeros(self.num_cars)
+        self.episode_reward = np.zeros(self.num_cars)
+        self.episode_steps = np.zeros(self.num_cars, dtype=np.int64)
+        self._reset_cars(self._cars)
+        return self.state.copy()
+
+    @staticmethod
+    def _orientation(a, b, c):
+        # Batched version of the orientation test in _segments_intersect: -1, 0 or 1 per row
+        val = (b[:, 1] - a[:, 1]) * (c[:, 0] - b[:, 0]) - (b[:, 0] - a[:, 0]) * (c[:, 1] - b[:, 1])
+        return np.where(np.abs(val) < 1e-6, 0, np.sign(val))
+
+    def _crossed(self, p1, p2, q1, q2):
+        orientation = self._orientation
+        return ((orientation(p1, p2, q1) != orientation(p1, p2, q2)) &
+                (orientation(q1, q2, p1) != orientation(q1, q2, p2)))
+
+    def step(self, actions):
+        """
+        Advance every car by one action. Returns (states, rewards, dones, info):
+        states are the cars' states after auto-reset and dones marks the cars that
+        were reset. info holds per-car arrays: next_states (the real successor
+        states, before any reset), terminated (ended by the env, as opposed to the
+        truncated step limit), finished (crossed every checkpoint) and the
+        episode_rewards / episode_steps of the episodes that ended.
+        """
+        actions = np.asarray(actions)
+        track = self.geometry
+        num_points = len(self.track_points)
+        old_positions = self.state[:, :2].astype(np.float64)
+        speed = self.state[:, 2].astype(np.float64)
+        angle = self.state[:, 3].astype(np.float64)
+
+        # Steering (and, without constant speed, throttle)
+        angle += np.where(actions == 3, 5, np.where(actions == 2, -5, 0))
+        if self.constant_speed:
+            speed[:] = self.constant_speed_value
+        else:
+            speed = np.where(actions == 0, speed + 1, np.where(actions == 1, np.maximum(0, speed - 1), speed))
+        radians = np.radians(angle)
+        positions = old_positions + speed[:, None] * np.stack([np.cos(radians), np.sin(radians)], axis=1)
+        x, y = positions[:, 0], positions[:, 1]
+
+        # Progress toward each car's next checkpoint, and checkpoint crossings
+        rewards = np.full(self.num_cars, float(self.step_penalty))
+        racing = self.waypoint_index < num_points
+        target = np.minimum(self.waypoint_index, num_points - 1)
+        waypoints = track.points[target]
+        distance = np.hypot(x - waypoints[:, 0], y - waypoints[:, 1])
+        rewards += np.where(racing, self.progress_factor * (self.prev_distance - distance), 0.0)
+        self.prev_distance = np.where(racing, distance, self.prev_distance)
+        crossed = racing & self._crossed(old_positions, positions,
+                                         track.checkpoint_start[target], track.checkpoint_end[target])
+        rewards += self.waypoint_bonus * crossed
+        self.waypoint_index += crossed
+        next_waypoints = track.points[np.minimum(self.waypoint_index, num_points - 1)]
+        self.prev_distance = np.where(crossed & (self.waypoint_index < num_points),
+                                      np.hypot(x - next_waypoints[:, 0], y - next_waypoints[:, 1]),
+                                      self.prev_distance)
+        rewards += np.where(racing, 0.0, self.finish_bonus)
+        terminated = ~racing
+
+        # Off track or off screen ends the episode with a fixed penalty
+        off = (track.off_track(positions) |
+               (x < 0) | (x > self.screen_width) | (y < 0) | (y > self.screen_height))
+        rewards = np.where(off, -10.0, rewards)
+        terminated |= off
+
+        self.state = np.column_stack([x, y, speed, angle]).astype(np.float32)
+        self.episode_reward += rewards
+        self.episode_steps += 1
+        truncated = ~terminated & (self.episode_steps >= self.max_episode_steps)
+        dones = terminated | truncated
+        info = {
+            "next_states": self.state.copy(),
+            "terminated": terminated,
+            "truncated": truncated,
+            "finished": dones & (self.waypoint_index >= num_points),
+            "episode_rewards": self.episode_reward.copy(),
+            "episode_steps": self.episode_steps.copy(),
+        }
+        if dones.any():
+            self._reset_cars(np.flatnonzero(dones))
+        return self.state.copy(), rewards.astype(np.float32), dones, info
+
+    def render(self):
+        if self.headless:
+            return
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+
+        if self._background is None:
+            self._background = self._build_background()
+            self.screen.blit(self._background, (0, 0))
+            previous = [self.screen.get_rect()]
+        else:
+            previous = self._dirty_rects
+            for rect in previous:
+                self.screen.blit(self._background, rect, rect)
+
+        # Every car, then a status line with the number still racing for a checkpoint
+        dirty = []
+        for x, y, speed, angle in self.state:
+            rotated_car = self._rotated_car(angle)
+            car_rect = rotated_car.get_rect(center=(int(x), int(y)))
+            dirty.append(self.screen.blit(rotated_car, car_rect.topleft))
+        racing = int(np.sum(self.waypoint_index < len(self.track_points)))
+        text_surface = self.font.render(f"Cars: {self.num_cars}  Racing: {racing}", True, (0, 0, 0))
+        dirty.append(self.screen.blit(text_surface, (10, 10)))
+
+        pygame.display.update(previous + dirty)
+        self._dirty_rects = dirty
+        if self.render_fps:
+            self.clock.tick(self.render_fps)
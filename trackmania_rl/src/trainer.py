@@ -2,7 +2,9 @@ import os
 import numpy as np
 import math
 from trackmania_pygame_env import TrackmaniaPygameEnv
+from trackmania_vec_env import TrackmaniaVecEnv
 from agent import DQNAgent
+from metrics import MetricsLogger
 import yaml
 
 def load_config(config_path):
@@ -10,11 +12,28 @@ def load_config(config_path):
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
+def should_render(episode, step, render_episodes, render_every):
+    """
+    Render schedule: every render_episodes-th episode is shown, and within it every
+    render_every-th step. 0 for either disables rendering.
+    """
+    if not render_episodes or not render_every:
+        return False
+    return episode % render_episodes == 0 and step % render_every == 0
+
 def train_agent(env, agent, config):
     episodes = config.get('episodes', 100)
     max_steps = config.get('max_steps', 200)
     batch_size = config.get('batch_size', 32)
+    # Rendering is rate-limited by the frame clock, so a sparse schedule speeds up training
+    render_episodes = config.get('render_episodes', 1)
+    render_every = config.get('render_every', 1)
     checkpoint_path = config.get('checkpoint_path', "models/checkpoint_latest.pth")
+    # Per-episode metrics go to a file; the console only gets a periodic throughput summary
+    metrics = MetricsLogger(config.get('metrics_path', "logs/trackmania_metrics.jsonl"),
+                            config.get('metrics_format', "jsonl"),
+                            summary_seconds=config.get('metrics_summary_seconds', 5.0),
+                            name="Trackmania")
 
     # Try to resume training from a saved checkpoint.
     if os.path.exists(checkpoint_path):
@@ -29,22 +48,28 @@ def train_agent(env, agent, config):
     for e in range(episodes):
         state = env.reset()
         total_reward = 0
+        losses = []
+        steps = 0
 
         for step in range(max_steps):
-            env.render()  # Visualize the current state
+            if should_render(e, step, render_episodes, render_every):
+                env.render()  # Visualize the current state
             action = agent.act(state)
             next_state, reward, done, _ = env.step(action)
             agent.remember(state, action, reward, next_state, done)
             state = next_state
             total_reward += reward
+            steps += 1
 
             if done:
                 break
 
             # Perform replay training
-            agent.replay(batch_size)
+            loss = agent.replay(batch_size)
+            if loss is not None:
+                losses.append(loss)
 
-        print(f"Episode {e+1}/{episodes}, Total Reward: {total_reward}")
+        metrics.log(total_reward, steps, epsilon=agent.epsilon, loss=np.mean(losses) if losses else None)
 
         # Example of curriculum learning: gradually make the environment more challenging.
         # (In this example, we reduce the off_track_threshold after 50 episodes to force better precision.)
@@ -56,10 +81,59 @@ def train_agent(env, agent, config):
         # Save a checkpoint every 10 episodes.
         if (e + 1) % 10 == 0:
             agent.save_checkpoint(checkpoint_path)
+    metrics.close()
+    print(f"Replay: {agent.updates} gradient updates, {agent.updates_per_second():.0f} updates/s")
+
+def train_vec_agent(env, agent, config):
+    """
+    train_agent for a TrackmaniaVecEnv: every step moves all cars, stores their
+    transitions in one batch and runs one replay() call. Runs until `episodes`
+    car episodes have ended; render_every renders every N-th batched step.
+    """
+    episodes = config.get('episodes', 100)
+    batch_size = config.get('batch_size', 32)
+    render_every = config.get('render_every', 1)
+    checkpoint_every = config.get('checkpoint_every', 1000)
+    checkpoint_path = config.get('checkpoint_path', "models/checkpoint_latest.pth")
+    metrics = MetricsLogger(config.get('metrics_path', "logs/trackmania_metrics.jsonl"),
+                            config.get('metrics_format', "jsonl"),
+                            summary_seconds=config.get('metrics_summary_seconds', 5.0),
+                            extra_fields=("finished",), name="Trackmania")
+
+    if os.path.exists(checkpoint_path):
+        try:
+            agent.load_checkpoint(checkpoint_path)
+            print("Checkpoint loaded. Resuming training...")
+        except Exception as e:
+            print("Failed to load checkpoint, starting fresh.", e)
+
+    states = env.reset()
+    step = 0
+    loss = None
+    while metrics.count < episodes:
+        if render_every and step % render_every == 0:
+            env.render()
+        actions = agent.act_batch(states)
+        next_states, rewards, dones, info = env.step(actions)
+        # Truncated cars did not really terminate, so their next state is still bootstrapped
+        agent.memory.add_batch(states, actions, rewards, info["next_states"], info["terminated"])
+        states = next_states
+        loss = agent.replay(batch_size)
+        step += 1
+
+        for car in np.flatnonzero(dones):
+            metrics.log(info["episode_rewards"][car], info["episode_steps"][car], epsilon=agent.epsilon,
+                        loss=loss, finished=float(info["finished"][car]))
+        if step % checkpoint_every == 0:
+            agent.save_checkpoint(checkpoint_path)
+    agent.save_checkpoint(checkpoint_path)
+    metrics.close()
+    print(f"Replay: {agent.updates} gradient updates, {agent.updates_per_second():.0f} updates/s")
 
-def evaluate_agent(env, agent, episodes=5):
+def evaluate_agent(env, agent, episodes=5, render_episodes=1, render_every=1):
     """
     Run several evaluation episodes where the agent uses its greedy policy.
+    render_episodes and render_every follow the same schedule as in train_agent.
     """
     # Save the current exploration rate and set epsilon to 0 to use the optimal policy.
     original_epsilon = agent.epsilon
@@ -68,8 +142,11 @@ def evaluate_agent(env, agent, episodes=5):
         state = env.reset()
         total_reward = 0
         done = False
+        step = 0
         while not done:
-            env.render()  # Visualize the optimal route.
+            if should_render(e, step, render_episodes, render_every):
+                env.render()  # Visualize the optimal route.
+            step += 1
             action = agent.act(state)  # With epsilon=0, agent acts greedily.
             next_state, reward, done, _ = env.step(action)
             state = next_state
@@ -89,7 +166,11 @@ if __name__ == "__main__":
     action_size = env.action_space.n if hasattr(env, "action_space") else 4
     agent = DQNAgent(obs_size, action_size, agent_config)
     
-    train_agent(env, agent, env_config)
+    if env_config.get('num_cars', 1) > 1:
+        # Train on many cars at once, then evaluate on the single-car env
+        train_vec_agent(TrackmaniaVecEnv(dict(env_config, headless=True)), agent, env_config)
+    else:
+        train_agent(env, agent, env_config)
     
     # After training, run evaluation episodes to see the optimal route.
     evaluate_agent(env, agent, episodes=5)
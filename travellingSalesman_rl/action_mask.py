@@ -0,0 +1,115 @@
+# action_mask.py
+import functools
+import numpy as np
+from tsp_solvers import candidate_lists, candidate_slots
+
+# Bit-expansion table: byte value -> its 8 bits, least significant first
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").astype(bool)
+# Same table inverted: byte value -> which of its 8 bits are clear
+BYTE_CLEAR_BITS = ~BYTE_BITS
+
+class ActionMasker:
+    """
+    Converts visited_mask bitmasks into boolean action masks and performs
+    masked action selection in NumPy. Every method accepts a single mask or an
+    array of masks (a batch of states); q_values then carry a matching leading shape.
+    """
+    def __init__(self, num_cities):
+        if num_cities > 64:
+            raise ValueError("visited masks are limited to 64 cities")
+        self.num_cities = num_cities
+        self.num_bytes = (num_cities + 7) // 8
+        self.full_mask = (1 << num_cities) - 1
+        self._shifts = np.arange(self.num_bytes, dtype=np.uint64) * np.uint64(8)
+
+    def _expand(self, masks, table):
+        if isinstance(masks, (int, np.integer)):
+            # Single state: the hot path of the tabular agent, kept to two NumPy calls
+            byte_values = np.frombuffer(int(masks).to_bytes(self.num_bytes, "little"), dtype=np.uint8)
+            return table[byte_values].ravel()[:self.num_cities]
+        masks = np.asarray(masks, dtype=np.uint64)
+        byte_values = (masks[..., None] >> self._shifts) & np.uint64(0xFF)
+        bits = table[byte_values.astype(np.intp)]
+        return bits.reshape(masks.shape + (self.num_bytes * 8,))[..., :self.num_cities]
+
+    def visited(self, masks):
+        """Boolean array (..., num_cities), True where the city is already visited."""
+        return self._expand(masks, BYTE_BITS)
+
+    def valid(self, masks):
+        """Boolean array (..., num_cities), True for cities that may still be chosen."""
+        return self._expand(masks, BYTE_CLEAR_BITS)
+
+    def masked_argmax(self, q_values, masks):
+        # Best valid action per state, -1 where no action is valid
+        if isinstance(masks, (int, np.integer)):
+            if masks & self.full_mask == self.full_mask:
+                return -1
+            return int(np.argmax(np.where(self.valid(masks), q_values, -np.inf)))
+        valid = self.valid(masks)
+        best = np.argmax(np.where(valid, q_values, -np.inf), axis=-1)
+        return np.where(valid.any(axis=-1), best, -1)
+
+    def masked_random(self, masks, rng):
+        # Uniformly random valid action per state, -1 where no action is valid
+        if isinstance(masks, (int, np.integer)):
+            if masks & self.full_mask == self.full_mask:
+                return -1
+            choices = np.flatnonzero(self.valid(masks))
+            return int(choices[int(rng.random() * len(choices))])
+        valid = self.valid(masks)
+        scores = np.where(valid, rng.random(valid.shape), -1.0)
+        return np.where(valid.any(axis=-1), np.argmax(scores, axis=-1), -1)
+
+    def epsilon_greedy(self, q_values, masks, epsilon, rng):
+        """Masked epsilon-greedy selection for a batch of states."""
+        greedy = self.masked_argmax(q_values, masks)
+        explore = rng.random(np.shape(greedy)) < epsilon
+        return np.where(explore, self.masked_random(masks, rng), greedy)
+
+@functools.lru_cache(maxsize=None)
+def action_masker(num_cities):
+    """Shared ActionMasker per city count, used by both environments and the agent."""
+    return ActionMasker(num_cities)
+
+class CandidateActions:
+    """
+    Restricts the action space to each city's K nearest neighbours.
+    Action slot i < K moves to the i-th nearest city of the current one and slot K
+    is a fallback to the nearest unvisited city, open only once all K candidates
+    are visited. Methods take the current city and a boolean mask of the cities
+    that may still be chosen, for one state or a batch.
+    """
+    def __init__(self, dist, k):
+        self.distances = dist
+        self.candidates = candidate_lists(dist, k)
+        self.k = self.candidates.shape[1]
+        self.num_actions = self.k + 1
+        self.slot_of = candidate_slots(self.candidates)
+
+    def slot_mask(self, current_city, valid):
+        """Boolean array (..., K+1), True for the slots that may be chosen."""
+        if isinstance(current_city, (int, np.integer)):
+            # Single state: plain indexing is much cheaper than the batched path
+            mask = np.zeros(self.num_actions, dtype=bool)
+            mask[:self.k] = valid[self.candidates[current_city]]
+            mask[self.k] = not mask.any() and valid.any()
+            return mask
+        open_candidates = np.take_along_axis(valid, self.candidates[current_city], axis=-1)
+        fallback = ~open_candidates.any(axis=-1, keepdims=True) & valid.any(axis=-1, keepdims=True)
+        return np.concatenate([open_candidates, fallback], axis=-1)
+
+    def cities(self, current_city, slots, valid):
+        """City reached through each slot; the fallback slot resolves to the nearest valid city."""
+        if isinstance(current_city, (int, np.integer)) and isinstance(slots, (int, np.integer)):
+            if slots < self.k:
+                return int(self.candidates[current_city, slots])
+            return int(np.argmin(np.where(valid, self.distances[current_city], np.inf)))
+        slots = np.asarray(slots)
+        nearest = np.argmin(np.where(valid, self.distances[current_city], np.inf), axis=-1)
+        direct = self.candidates[current_city, np.minimum(slots, self.k - 1)]
+        return np.where(slots == self.k, nearest, direct)
+
+def candidate_actions(dist, k):
+    """CandidateActions for k > 0, or None to keep all cities as actions."""
+    return CandidateActions(dist, k) if k else None
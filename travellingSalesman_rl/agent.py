@@ -1,7 +1,20 @@
 # agent.py
 import numpy as np
 import random
+import hashlib
+import json
+import os
 import config
+from q_store import SparseQTable
+
+def metadata_path(path):
+    # Metadata lives next to the .npy file, e.g. q_table.npy -> q_table.json
+    # (same helper in maze_rl/ and travellingSalesman_rl/agent.py)
+    return os.path.splitext(path)[0] + ".json"
+
+def cities_hash(cities):
+    # Identifies the TSP instance, e.g. to check that a saved Q-table belongs to it
+    return hashlib.sha1(np.asarray(cities, dtype=np.float64).tobytes()).hexdigest()
 
 class Agent:
     def __init__(self, env, epsilon=config.EPSILON, alpha=config.ALPHA, gamma=config.GAMMA):
@@ -10,38 +23,98 @@ class Agent:
         self.alpha = alpha
         self.gamma = gamma
         self.num_cities = config.NUM_CITIES
-        # There are 2^(NUM_CITIES) possible visited_mask states.
-        self.num_states = 1 << self.num_cities
-        # Q-table dimensions: (current_city, visited_mask, action)
-        self.q_table = np.zeros((self.num_cities, self.num_states, self.num_cities))
+        self.masker = env.masker
+        # With candidate lists, actions are slots into the current city's K nearest neighbours
+        self.num_actions = self.candidates.num_actions if self.candidates else self.num_cities
+        self.rng = np.random.default_rng()
+        # There are 2^(NUM_CITIES) possible visited_mask states, but only visited ones are stored:
+        # the Q-table maps (current_city, visited_mask) to a row of Q-values per action.
+        self.q_table = SparseQTable(self.num_cities, max_bytes=config.Q_STORE_MAX_MB * 2**20,
+                                    eviction=config.Q_STORE_EVICTION, num_actions=self.num_actions)
+        self.episodes_trained = 0
     
+    @property
+    def candidates(self):
+        # Read from the env on every use: it rebuilds the lists when it switches instance
+        return self.env.candidates
+
     def choose_action(self, state):
+        """Epsilon-greedy choice of the next city, or None if every city is visited."""
+        if self.candidates is not None:
+            return self._choose_candidate(state)
+        current_city, visited_mask = state
+        # Epsilon-greedy action selection among valid actions (cities not yet visited)
+        if random.uniform(0, 1) < self.epsilon:
+            action = self.masker.masked_random(visited_mask, self.rng)
+        else:
+            row = self.q_table.get(state)
+            q_values = row if row is not None else np.zeros(self.num_cities)
+            action = self.masker.masked_argmax(q_values, visited_mask)
+        return action if action >= 0 else None
+
+    def _choose_candidate(self, state):
+        # Epsilon-greedy over the open candidate slots, mapped back to a city
         current_city, visited_mask = state
-        # Compute list of valid actions (cities not yet visited)
-        valid_actions = [a for a in range(self.num_cities) if not (visited_mask & (1 << a))]
-        if not valid_actions:
+        valid = self.masker.valid(visited_mask)
+        slots = self.candidates.slot_mask(current_city, valid)
+        if not slots.any():
             return None
-        
-        # Epsilon-greedy action selection among valid actions
         if random.uniform(0, 1) < self.epsilon:
-            return random.choice(valid_actions)
+            choices = np.flatnonzero(slots)
+            slot = int(choices[int(self.rng.random() * len(choices))])
         else:
-            q_values = self.q_table[current_city, visited_mask, :].copy()
-            # Mask invalid actions by setting their Q-values very low
-            for a in range(self.num_cities):
-                if a not in valid_actions:
-                    q_values[a] = -1e9
-            return int(np.argmax(q_values))
-    
+            row = self.q_table.get(state)
+            q_values = row if row is not None else np.zeros(self.num_actions)
+            slot = int(np.argmax(np.where(slots, q_values, -np.inf)))
+        return self.candidates.cities(current_city, slot, valid)
+
     def update_q(self, state, action, reward, next_state):
-        current_city, visited_mask = state
-        current_q = self.q_table[current_city, visited_mask, action]
+        """Q-learning update for moving to city action from state."""
+        if self.candidates is not None:
+            # Store the value under the slot the city was reached through
+            action = self.candidates.slot_of[state[0], action]
+        row = self.q_table.get(state)
+        current_q = row[action] if row is not None else 0.0
         
         if next_state is None:
             target = reward  # Terminal state
         else:
-            next_city, next_visited = next_state
-            target = reward + self.gamma * np.max(self.q_table[next_city, next_visited, :])
+            next_row = self.q_table.get(next_state)
+            target = reward + self.gamma * (np.max(next_row) if next_row is not None else 0.0)
         
-        self.q_table[current_city, visited_mask, action] = current_q + self.alpha * (target - current_q)
-    
\ No newline at end of file
+        self.q_table.set(state, action, current_q + self.alpha * (target - current_q))
+
+    def save(self, path=config.Q_TABLE_PATH):
+        """
+        Persist the Q-store as .npy files (Q-values at path, hash keys and usage
+        counters next to it) plus a small .json with hyperparameters, episode
+        count and cities hash. Arrays memory-mapped from the same files are flushed in place.
+        """
+        self.q_table.save(path)
+        metadata = {
+            "epsilon": self.epsilon,
+            "alpha": self.alpha,
+            "gamma": self.gamma,
+            "episodes": self.episodes_trained,
+            "cities_hash": cities_hash(self.env.cities),
+            "states": len(self.q_table),
+            "candidate_k": self.candidates.k if self.candidates else None,
+        }
+        with open(metadata_path(path), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+    def load(self, path=config.Q_TABLE_PATH, mmap_mode="r"):
+        """
+        Memory-map a saved Q-store without reading it into RAM.
+        mmap_mode "r" is read-only (demo/evaluation), "r+" resumes training and
+        writes updates back to the files. Returns the saved metadata.
+        """
+        with open(metadata_path(path)) as f:
+            metadata = json.load(f)
+        if metadata["cities_hash"] != cities_hash(self.env.cities):
+            raise ValueError(f"{path} was trained on different cities")
+        if metadata.get("candidate_k") != (self.candidates.k if self.candidates else None):
+            raise ValueError(f"{path} was trained with candidate_k={metadata.get('candidate_k')}")
+        self.q_table.load(path, mmap_mode=mmap_mode)
+        self.episodes_trained = metadata["episodes"]
+        return metadata
@@ -0,0 +1,175 @@
+# benchmark.py
+import multiprocessing
+import resource
+import time
+import config
+
+BENCHMARK_TIMESTEPS = 4096
+ENV_BENCHMARK_SECONDS = 2.0
+
+def _ppo_run(env_kwargs, total_timesteps, results):
+    # Runs in a fresh process so the peak RSS belongs to this configuration alone
+    from stable_baselines3 import PPO
+    from tsp_gym_env import TSPGymEnv
+
+    env = TSPGymEnv(**env_kwargs)
+    model = PPO("MultiInputPolicy", env, verbose=0)
+    start = time.perf_counter()
+    model.learn(total_timesteps=total_timesteps)
+    elapsed = time.perf_counter() - start
+    results.put({
+        "steps_per_sec": total_timesteps / elapsed,
+        "episodes_per_sec": env.episodes_completed / elapsed,
+        "useful_fraction": env.useful_steps / max(env.total_steps, 1),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "parameters": sum(p.numel() for p in model.policy.parameters()),
+    })
+
+def _run_isolated(env_kwargs, total_timesteps):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_ppo_run, args=(env_kwargs, total_timesteps, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def benchmark_observation_modes(total_timesteps=BENCHMARK_TIMESTEPS):
+    """
+    Train PPO for total_timesteps under each observation encoding and report
+    steps/sec, peak memory and policy size. Each run uses its own process.
+    """
+    encodings = [("discrete", False), ("multibinary", False), ("multibinary", True)]
+    print(f"PPO on {config.NUM_CITIES} cities, {total_timesteps} timesteps per encoding")
+    for observation_mode, city_features in encodings:
+        result = _run_isolated({"observation_mode": observation_mode, "city_features": city_features,
+                                "invalid_actions": config.INVALID_ACTIONS, "candidate_k": config.CANDIDATE_K},
+                               total_timesteps)
+        name = observation_mode + (" + city features" if city_features else "")
+        print(f"{name:<30} {result['steps_per_sec']:8.1f} steps/s  "
+              f"peak RSS {result['peak_rss_mb']:8.1f} MB  {result['parameters']:>10,} parameters")
+
+def benchmark_invalid_actions(total_timesteps=BENCHMARK_TIMESTEPS):
+    """Compare penalised and remapped invalid actions: useful step fraction and episodes/sec."""
+    print(f"PPO on {config.NUM_CITIES} cities, {total_timesteps} timesteps per setting")
+    for invalid_actions in ("penalise", "remap"):
+        result = _run_isolated({"observation_mode": config.OBSERVATION_MODE, "city_features": config.CITY_FEATURES,
+                                "invalid_actions": invalid_actions, "candidate_k": config.CANDIDATE_K},
+                               total_timesteps)
+        print(f"{invalid_actions:<10} useful steps {result['useful_fraction']:6.1%}  "
+              f"{result['episodes_per_sec']:8.1f} episodes/s  {result['steps_per_sec']:8.1f} steps/s")
+
+def benchmark_vec_env(num_envs=config.NUM_ENVS, seconds=ENV_BENCHMARK_SECONDS):
+    """
+    Raw env throughput with random actions: one TSPGymEnv against a TSPVecEnv of
+    num_envs tours, both set up like the PPO envs in main.py.
+    """
+    import numpy as np
+    from tsp_gym_env import TSPGymEnv
+    from tsp_vec_env import TSPVecEnv
+
+    rng = np.random.default_rng(0)
+    env_kwargs = {"observation_mode": config.OBSERVATION_MODE, "city_features": config.CITY_FEATURES,
+                  "invalid_actions": config.INVALID_ACTIONS, "candidate_k": config.CANDIDATE_K}
+    env = TSPGymEnv(**env_kwargs)
+    env.reset()
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        _, _, done, _, _ = env.step(int(rng.integers(env.action_space.n)))
+        steps += 1
+        if done:
+            env.reset()
+    print(f"TSPGymEnv              {steps / (time.perf_counter() - start):12.0f} steps/s")
+
+    vec_env = TSPVecEnv(num_envs=num_envs, **env_kwargs)
+    vec_env.reset()
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        vec_env.step(rng.integers(vec_env.action_space.n, size=num_envs))
+        steps += num_envs
+    print(f"TSPVecEnv ({num_envs:>4} tours) {steps / (time.perf_counter() - start):12.0f} steps/s")
+
+def benchmark_local_search(num_tours=20, seed=0):
+    """Route quality per CPU millisecond: 2-opt / Or-opt on random and nearest-neighbour tours."""
+    import numpy as np
+    from local_search import improve_with_report
+    from tsp_solvers import distance_matrix, nearest_neighbour_tour
+
+    rng = np.random.default_rng(seed)
+    dist = distance_matrix(config.CITIES)
+    starts = {"random": [[0] + list(rng.permutation(np.arange(1, config.NUM_CITIES))) for _ in range(num_tours)],
+              "nearest neighbour": [nearest_neighbour_tour(dist)[1]]}
+    for name, routes in starts.items():
+        results = [improve_with_report(route, dist) for route in routes]
+        improvement = np.mean([r["improvement"] for r in results])
+        time_ms = np.mean([r["time_ms"] for r in results])
+        print(f"{name:<18} {improvement:6.1%} shorter in {time_ms:6.2f} ms per tour "
+              f"({improvement / max(time_ms, 1e-9):.2%} per ms)")
+
+def benchmark_candidate_lists(num_episodes=3000, k=config.CANDIDATE_K):
+    """Tabular Q-learning with all cities as actions against K-nearest candidate lists."""
+    from agent import Agent
+    from tsp_env import TSPEnv
+    from tsp_solvers import tour_length
+
+    for candidate_k in (None, k):
+        env = TSPEnv(candidate_k=candidate_k)
+        agent = Agent(env)
+        best_length = float("inf")
+        start = time.perf_counter()
+        for _ in range(num_episodes):
+            state = env.reset()
+            done = False
+            while not done:
+                action = agent.choose_action(state)
+                if action is None:
+                    break
+                next_state, reward, done = env.step(state, action)
+                agent.update_q(state, action, reward, next_state)
+                state = next_state
+            if done:
+                best_length = min(best_length, tour_length(env.route, env.distances))
+        elapsed = time.perf_counter() - start
+        name = f"K={candidate_k}" if candidate_k else "all cities"
+        print(f"{name:<12} best tour {best_length:8.1f}  {len(agent.q_table):7d} states  "
+              f"{agent.q_table.nbytes / 2**20:6.1f} MB  {num_episodes / elapsed:7.0f} episodes/s")
+
+def benchmark_hogwild(num_episodes=config.NUM_EPISODES, worker_counts=(1, 2, 4, 8)):
+    """Episodes/sec against worker count, and greedy tour quality against the serial Trainer."""
+    import contextlib
+    import io
+    from agent import Agent
+    from hogwild_trainer import HogwildTrainer
+    from trainer import Trainer, greedy_tour
+    from tsp_env import TSPEnv
+
+    env = TSPEnv()
+    agent = Agent(env)
+    trainer = Trainer(agent, env, num_episodes, solve_optimum=True)
+    trainer.optimal_length  # Solve Held-Karp before the clock starts
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer.train()
+    serial_rate = num_episodes / (time.perf_counter() - start)
+    greedy_length, _ = greedy_tour(agent, env)
+    print(f"{'serial':<10} {serial_rate:8.0f} episodes/s  speedup 1.00x  greedy gap {trainer.gap(greedy_length):6.1%}")
+
+    for num_workers in worker_counts:
+        agent = Agent(env)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = HogwildTrainer(agent, env, num_episodes, num_workers).train()
+        greedy_length, _ = greedy_tour(agent, env)
+        print(f"{num_workers:>2} workers {stats['episodes_per_sec']:8.0f} episodes/s  "
+              f"speedup {stats['episodes_per_sec'] / serial_rate:4.2f}x  greedy gap {trainer.gap(greedy_length):6.1%}  "
+              f"best gap {trainer.gap(stats['best_length']):6.1%}")
+
+if __name__ == '__main__':
+    benchmark_hogwild()
+    benchmark_candidate_lists()
+    benchmark_local_search()
+    benchmark_vec_env()
+    benchmark_observation_modes()
+    benchmark_invalid_actions()
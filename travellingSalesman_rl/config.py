@@ -17,11 +17,71 @@ NUM_EPISODES = 10000
 # In TSP, the maximum number of moves (steps) is NUM_CITIES - 1 (since the start is fixed)
 MAX_STEPS = NUM_CITIES - 1
 
+# Tour gaps are reported against the Held-Karp optimum when SOLVE_OPTIMUM is set (about
+# 0.7 s to solve for 20 cities) or the instance carries one, else the nearest-neighbour tour
+SOLVE_OPTIMUM = False
+
 # RL hyperparameters
 EPSILON = 0.1  # Exploration rate
 ALPHA = 0.5    # Learning rate
 GAMMA = 0.9    # Discount factor
 
+# Candidate lists used by main.py and tabular_main.py: actions are restricted to each
+# city's CANDIDATE_K nearest neighbours plus one fallback to the nearest unvisited city
+# (None considers every city, which is what the envs do by default)
+CANDIDATE_K = 8
+
+# Sparse Q-store of the tabular agent: memory cap in MB and which entries to drop
+# when it is reached ("lru" = least recently used, "visits" = least visited)
+Q_STORE_MAX_MB = 256
+Q_STORE_EVICTION = "lru"
+
+# Hogwild training (hogwild_trainer.py): worker processes sharing one Q-table, whose
+# fixed size in shared memory is HOGWILD_Q_MB (it does not grow or evict)
+USE_HOGWILD = False
+NUM_WORKERS = 4
+HOGWILD_Q_MB = 64
+
+# Saved tabular Q-table (.npy, with a .json metadata file next to it). With a saved
+# table TRAIN_ON_LAUNCH = True resumes training from it; False maps it read-only and
+# goes straight to the demonstration.
+Q_TABLE_PATH = "tsp_q_table.npy"
+TRAIN_ON_LAUNCH = True
+
+# Observation encoding of the PPO envs in main.py: "multibinary" (visited cities as
+# MultiBinary(n)) or "discrete" (visited bitmask as Discrete(2^n), which SB3 one-hot
+# encodes into a 2^n wide input; TSPGymEnv's default, matching older checkpoints).
+# CITY_FEATURES adds per-city coordinates and distances.
+OBSERVATION_MODE = "multibinary"
+CITY_FEATURES = True
+# What the PPO envs in main.py do with an already visited city: "penalise" (-100 reward,
+# no move; the env default) or "remap" (move to the nearest unvisited city, so no
+# timestep is wasted)
+INVALID_ACTIONS = "remap"
+
+# PPO training on TSPVecEnv: number of tours simulated together and rollout steps per tour
+NUM_ENVS = 64
+PPO_N_STEPS = 64
+PPO_TIMESTEPS = 10000
+
+# Instance datasets (tsp_dataset.py): memory-mapped .npy shards of random instances.
+# Running tsp_dataset.py writes DATASET_SIZE instances to DATASET_PATH; with
+# TRAIN_ON_DATASET the PPO run in main.py then streams its training instances from it
+# (the tabular agent stays on CITIES, since its Q-table belongs to one instance).
+DATASET_PATH = "tsp_instances"
+DATASET_SIZE = 100000
+DATASET_SEED = 0
+DATASET_SHARD_SIZE = 4096
+DATASET_BATCH_SIZE = 256
+TRAIN_ON_DATASET = False
+
+# Training metrics (metrics.py): per-episode rows are written to METRICS_PATH
+# ("jsonl", "csv" or "npz" per METRICS_FORMAT; None keeps them in memory) and the
+# console shows a throughput summary at most every METRICS_SUMMARY_SECONDS.
+METRICS_PATH = "logs/tsp_metrics.jsonl"
+METRICS_FORMAT = "jsonl"
+METRICS_SUMMARY_SECONDS = 5.0
+
 # Visualization parameters
 CLOCK_TICK_TRAINING = 60  # Speed during training visualization (if used)
 CLOCK_TICK_DEMO = 2       # Slower speed during demonstration
@@ -0,0 +1,142 @@
+# hogwild_trainer.py
+import multiprocessing
+import random
+import queue
+import time
+import traceback
+import numpy as np
+import config
+from q_store import SharedSparseQTable
+from tsp_solvers import tour_length
+
+POLL_SECONDS = 1.0  # How often train() checks on the workers while waiting for their results
+
+def _worker(index, table_spec, instance, num_episodes, seed, hyperparameters, results):
+    # Each worker plays its share of episodes against the shared Q-table and reports
+    # (index, outcome, None), or (index, None, (exception, traceback)) if it fails
+    from agent import Agent
+    from tsp_env import TSPEnv
+
+    table = None
+    try:
+        cities, distances, candidate_k = instance
+        env = TSPEnv(cities, candidate_k=candidate_k)
+        env.set_instance(cities, distances)
+        agent = Agent(env, **hyperparameters)
+        agent.q_table = table = SharedSparseQTable(**table_spec)
+        # Independent RNG streams: NumPy for masked choices, random for the epsilon coin flips
+        agent.rng = np.random.default_rng(seed)
+        random.seed(int(seed.generate_state(1)[0]))
+
+        best_length, best_route = float("inf"), None
+        completed = 0
+        for _ in range(num_episodes):
+            state = env.reset()
+            done = False
+            while not done:
+                action = agent.choose_action(state)
+                if action is None:
+                    break
+                next_state, reward, done = env.step(state, action)
+                agent.update_q(state, action, reward, next_state)
+                state = next_state
+            if done:
+                completed += 1
+                length = tour_length(env.route, env.distances)
+                if length < best_length:
+                    best_length, best_route = length, list(env.route)
+        results.put((index, (completed, best_length, best_route), None))
+    except Exception as e:
+        results.put((index, None, (e, traceback.format_exc())))
+    finally:
+        if table is not None:
+            table.close()
+
+class HogwildTrainer:
+    """
+    Trains the tabular agent with num_workers processes sharing one Q-table in
+    shared memory (SharedSparseQTable). Workers split the episodes, draw from
+    their own RNG streams and write Q-updates without locks. The agent's current
+    Q-table seeds the shared one and receives the result when training ends.
+    Every worker trains on env's cities; envs that stream instances are not supported.
+    An exception in a worker (e.g. a full shared table) stops the others and is
+    re-raised by train().
+    """
+    def __init__(self, agent, env, num_episodes=config.NUM_EPISODES, num_workers=config.NUM_WORKERS, seed=0):
+        if env.instances is not None:
+            raise ValueError("HogwildTrainer trains on a single instance; env streams instances")
+        self.agent = agent
+        self.env = env
+        self.num_episodes = num_episodes
+        self.num_workers = num_workers
+        self.seed = seed
+
+    def _collect(self, workers, results):
+        # Wait for every worker's outcome without hanging on one that died before reporting
+        outcomes = {}
+        while len(outcomes) < len(workers):
+            try:
+                index, outcome, failure = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                # A worker's result is queued before it exits, so check the queue once more before giving up on it
+                dead = [i for i, worker in enumerate(workers) if i not in outcomes and not worker.is_alive()]
+                if not dead:
+                    continue
+                try:
+                    index, outcome, failure = results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    raise RuntimeError(f"Hogwild worker {dead[0]} exited with code {workers[dead[0]].exitcode} "
+                                       f"without reporting a result") from None
+            if failure is not None:
+                error, trace = failure
+                raise error from RuntimeError(f"in Hogwild worker {index}:\n{trace}")
+            outcomes[index] = outcome
+        return [outcomes[i] for i in range(len(workers))]
+
+    def train(self):
+        """Run the workers and return a dict with episodes, seconds, episodes_per_sec and the best tour."""
+        agent = self.agent
+        table = SharedSparseQTable(agent.num_cities, max_bytes=config.HOGWILD_Q_MB * 2**20,
+                                   num_actions=agent.num_actions)
+        try:
+            table.copy_from(agent.q_table)
+            hyperparameters = {"epsilon": agent.epsilon, "alpha": agent.alpha, "gamma": agent.gamma}
+            seeds = np.random.SeedSequence(self.seed).spawn(self.num_workers)
+            shares = np.diff(np.linspace(0, self.num_episodes, self.num_workers + 1).astype(int))
+
+            ctx = multiprocessing.get_context()
+            results = ctx.Queue()
+            instance = (self.env.cities, self.env.distances, self.env.candidate_k)
+            workers = [ctx.Process(target=_worker, args=(i, table.spec, instance, int(share), seed,
+                                                         hyperparameters, results))
+                       for i, (share, seed) in enumerate(zip(shares, seeds))]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            try:
+                outcomes = self._collect(workers, results)
+            finally:
+                for worker in workers:
+                    if worker.is_alive():
+                        worker.terminate()
+                    worker.join()
+            elapsed = time.perf_counter() - start
+
+            agent.q_table = table.to_sparse(max_bytes=config.Q_STORE_MAX_MB * 2**20, eviction=config.Q_STORE_EVICTION)
+        finally:
+            table.close()
+
+        agent.episodes_trained += self.num_episodes
+        best_length, best_route = min(((length, route) for _, length, route in outcomes), key=lambda o: o[0])
+        stats = {
+            "workers": self.num_workers,
+            "episodes": self.num_episodes,
+            "completed": sum(completed for completed, _, _ in outcomes),
+            "seconds": elapsed,
+            "episodes_per_sec": self.num_episodes / elapsed,
+            "best_length": best_length,
+            "best_route": best_route,
+        }
+        print(f"Hogwild: {self.num_episodes} episodes on {self.num_workers} workers in {elapsed:.1f}s "
+              f"({stats['episodes_per_sec']:.0f} episodes/s), best tour {best_length:.1f}")
+        return stats
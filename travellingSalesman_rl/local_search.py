@@ -0,0 +1,116 @@
+# local_search.py
+import time
+import numpy as np
+from tsp_solvers import tour_length
+
+# Smallest length reduction counted as an improvement (guards against float32 noise)
+MIN_GAIN = 1e-4
+# Or-opt moves segments of 1 to OR_OPT_MAX_SEGMENT consecutive cities
+OR_OPT_MAX_SEGMENT = 3
+
+def _as_tour(route):
+    # Route as an int array without the closing return to its first city
+    tour = np.asarray(route, dtype=np.int64)
+    if len(tour) > 1 and tour[-1] == tour[0]:
+        tour = tour[:-1]
+    return tour.copy()
+
+def _rotate_to(tour, start):
+    return np.roll(tour, -int(np.flatnonzero(tour == start)[0]))
+
+def two_opt_move(tour, dist):
+    """
+    Best 2-opt move of the closed tour: replace edges (t[i], t[i+1]) and (t[j], t[j+1])
+    by (t[i], t[j]) and (t[i+1], t[j+1]). The gains of all i < j come from one
+    array expression over the distance matrix. Returns (gain, i, j).
+    """
+    n = len(tour)
+    a, b = tour, np.roll(tour, -1)
+    gains = (dist[a, b][:, None] + dist[a, b][None, :]) - dist[np.ix_(a, a)] - dist[np.ix_(b, b)]
+    # Only pairs of non-adjacent edges with i < j form a valid move
+    i, j = np.triu_indices(n, 2)
+    keep = ~((i == 0) & (j == n - 1))
+    i, j = i[keep], j[keep]
+    best = int(np.argmax(gains[i, j]))
+    return float(gains[i[best], j[best]]), int(i[best]), int(j[best])
+
+def or_opt_move(tour, dist, max_segment=OR_OPT_MAX_SEGMENT):
+    """
+    Best Or-opt move: cut out a segment of 1..max_segment cities and reinsert it,
+    possibly reversed, between two other neighbouring cities. Gains for every
+    segment start and insertion edge are computed as one array per segment length.
+    Returns (gain, start, length, edge, reversed).
+    """
+    n = len(tour)
+    nxt = np.roll(tour, -1)
+    edge = dist[tour, nxt]
+    offsets = (np.arange(n)[None, :] - np.arange(n)[:, None]) % n
+    best = (0.0, 0, 1, 0, False)
+    for length in range(1, min(max_segment, n - 3) + 1):
+        first = tour
+        last = np.roll(tour, -(length - 1))
+        before = np.roll(tour, 1)
+        after = np.roll(tour, -length)
+        # Length saved by cutting each segment out and joining its neighbours
+        removal = dist[before, first] + dist[last, after] - dist[before, after]
+        # Cost of inserting it into edge k, forwards and reversed; rows are segment starts
+        forward = dist[tour[None, :], first[:, None]] + dist[last[:, None], nxt[None, :]] - edge
+        backward = dist[tour[None, :], last[:, None]] + dist[first[:, None], nxt[None, :]] - edge
+        # Edges touching the segment itself cannot take it: offsets -1 .. length-1 from its start
+        invalid = (offsets + 1) % n <= length
+        for reverse, insertion in ((False, forward), (True, backward)):
+            gains = np.where(invalid, -np.inf, removal[:, None] - insertion)
+            start, k = np.unravel_index(int(np.argmax(gains)), gains.shape)
+            if gains[start, k] > best[0]:
+                best = (float(gains[start, k]), int(start), length, int(k), reverse)
+    return best
+
+def _apply_or_opt(tour, start, length, edge, reverse):
+    n = len(tour)
+    # Rotate so the segment sits at the front, then reinsert it after the edge's first city
+    rotated = np.roll(tour, -start)
+    segment, rest = rotated[:length], rotated[length:]
+    if reverse:
+        segment = segment[::-1]
+    position = (edge - start) % n - length + 1
+    return np.concatenate([rest[:position], segment, rest[position:]])
+
+def improve_tour(route, dist, max_iterations=1000):
+    """
+    2-opt and Or-opt local search on a complete route (with or without the
+    closing return). Applies the best 2-opt move until none improves, then the
+    best Or-opt move, and repeats until neither helps. Returns (length, tour)
+    like the solvers in tsp_solvers, starting at the route's first city.
+    """
+    tour = _as_tour(route)
+    if len(tour) < 4:
+        return tour_length(tour, dist), tour.tolist()
+    start = tour[0]
+    for _ in range(max_iterations):
+        gain, i, j = two_opt_move(tour, dist)
+        if gain > MIN_GAIN:
+            tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+            continue
+        gain, *move = or_opt_move(tour, dist)
+        if gain > MIN_GAIN:
+            tour = _apply_or_opt(tour, *move)
+            continue
+        break
+    tour = _rotate_to(tour, start)
+    return tour_length(tour, dist), tour.tolist()
+
+def improve_with_report(route, dist, max_iterations=1000):
+    """
+    improve_tour() plus the numbers for judging it: a dict with length_before,
+    length, improvement (relative), time_ms and the improved tour.
+    """
+    length_before = tour_length(route, dist)
+    start = time.perf_counter()
+    length, tour = improve_tour(route, dist, max_iterations)
+    return {
+        "length_before": length_before,
+        "length": length,
+        "improvement": 1 - length / length_before if length_before else 0.0,
+        "time_ms": (time.perf_counter() - start) * 1000,
+        "tour": tour,
+    }
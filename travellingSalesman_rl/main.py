@@ -3,26 +3,47 @@
 import gym
 import pygame
 import sys
+import time
 import config
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
+from tsp_dataset import TSPDataset
 from tsp_gym_env import TSPGymEnv
+from tsp_vec_env import TSPVecEnv
+from local_search import improve_with_report
+from tsp_solvers import held_karp, nearest_neighbour_tour, tour_length
 
 def main():
-    # Create the Gym environment for TSP
-    env = TSPGymEnv()
+    # Create the Gym environment for TSP; the compact MultiBinary encoding keeps the policy input small
+    env = TSPGymEnv(observation_mode=config.OBSERVATION_MODE, city_features=config.CITY_FEATURES,
+                    invalid_actions=config.INVALID_ACTIONS, candidate_k=config.CANDIDATE_K)
     
     # (Optional) Check if the environment follows Gym API
     check_env(env, warn=True)
     
+    # Rollouts are collected from NUM_ENVS tours simulated together in NumPy, optionally
+    # on a stream of instances read from the memory-mapped dataset
+    instances = None
+    if config.TRAIN_ON_DATASET:
+        instances = TSPDataset(config.DATASET_PATH).stream(seed=config.DATASET_SEED)
+    train_env = TSPVecEnv(num_envs=config.NUM_ENVS, observation_mode=config.OBSERVATION_MODE,
+                          city_features=config.CITY_FEATURES, invalid_actions=config.INVALID_ACTIONS,
+                          candidate_k=config.CANDIDATE_K, instances=instances)
+
     # Create the PPO model using an MLP policy
-    model = PPO("MultiInputPolicy", env, verbose=1)
+    model = PPO("MultiInputPolicy", train_env, n_steps=config.PPO_N_STEPS, verbose=1)
     
     # Train the model; you can adjust total_timesteps as needed.
-    model.learn(total_timesteps=10000)
+    start = time.perf_counter()
+    model.learn(total_timesteps=config.PPO_TIMESTEPS)
+    elapsed = time.perf_counter() - start
+    # How much of the timestep budget actually moved the salesman
+    print(f"Useful steps: {train_env.useful_steps / max(train_env.total_steps, 1):.1%} of {train_env.total_steps}, "
+          f"{train_env.episodes_completed / elapsed:.1f} episodes/s, {train_env.total_steps / elapsed:.0f} steps/s "
+          f"({config.INVALID_ACTIONS} invalid actions)")
     
     # Demonstration phase
-    obs = env.reset()
+    obs, _ = env.reset()
     done = False
 
     # Initialize pygame display for rendering
@@ -39,10 +60,22 @@ def main():
         
         # Predict the next action using the trained model
         action, _states = model.predict(obs)
-        obs, reward, done, info = env.step(action)
+        obs, reward, terminated, truncated, info = env.step(action)
+        done = terminated or truncated
         env.render()
         clock.tick(config.CLOCK_TICK_DEMO)
     
+    # Compare the route with the exact optimum and the nearest-neighbour baseline
+    length = tour_length(env.route, env.distances)
+    optimal_length, _ = held_karp(env.distances)
+    baseline_length, _ = nearest_neighbour_tour(env.distances)
+    print(f"Route length: {length:.1f}, optimal: {optimal_length:.1f} (gap {length / optimal_length - 1:.1%}), "
+          f"nearest neighbour: {baseline_length:.1f}")
+    # Final output: the policy's route polished by 2-opt / Or-opt
+    result = improve_with_report(env.route, env.distances)
+    print(f"After local search: {result['length']:.1f} (gap {result['length'] / optimal_length - 1:.1%}), "
+          f"{result['improvement']:.1%} shorter in {result['time_ms']:.1f} ms")
+    print("Improved route:", result["tour"])
     print("Route complete! Press the close button to exit.")
     # Keep the window open until closed by the user
     while True:
@@ -0,0 +1,165 @@
+# metrics.py
+# Each project is standalone, so maze_rl/, travellingSalesman_rl/ and trackmania_rl/src/
+# carry identical copies of this file: apply changes to all three.
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+FIELDS = ("episode", "reward", "steps", "epsilon", "loss", "wall_time")
+FORMATS = ("jsonl", "csv", "npz")
+
+class MetricsLogger:
+    """
+    Per-episode training metrics with little overhead in the training loop.
+    Each log() call writes one row into preallocated ring buffers (one NumPy
+    array per field). Every flush_every episodes the new rows are handed to a
+    background thread that appends them to path as JSONL or CSV, or writes them
+    as a numbered .npz file. Instead of a line per episode, the console gets a
+    summary with episodes/sec and steps/sec at most every summary_seconds.
+    path=None keeps metrics in memory only; extra_fields adds named columns.
+    """
+    def __init__(self, path=None, fmt="jsonl", capacity=4096, flush_every=512,
+                 summary_seconds=5.0, extra_fields=(), background=True, name="Training"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        if flush_every > capacity:
+            raise ValueError("flush_every must not exceed the ring buffer capacity")
+        self.path = path
+        self.fmt = fmt
+        self.capacity = capacity
+        self.flush_every = flush_every
+        self.summary_seconds = summary_seconds
+        self.name = name
+        self.extra_fields = tuple(extra_fields)
+        self.fields = FIELDS + self.extra_fields
+        self.buffers = {field: np.full(capacity, np.nan) for field in self.fields}
+        self.count = 0          # Episodes logged so far
+        self.flushed = 0        # Episodes handed to the writer
+        self.total_steps = 0
+        self.start_time = time.perf_counter()
+        self._last_summary = self.start_time
+        self._summary_count = 0
+        self._summary_steps = 0
+        self._chunk = 0
+
+        self._queue = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if fmt != "npz":
+                # Start a fresh file for this run
+                open(path, "w").close()
+            if background:
+                self._queue = queue.Queue()
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+
+    def log(self, reward, steps, epsilon=np.nan, loss=np.nan, **extra):
+        """Record one finished episode."""
+        # Reject unknown fields before touching the buffers, so a failed call leaves no partial row
+        if extra.keys() - set(self.extra_fields):
+            raise KeyError(f"Unknown metrics fields: {sorted(extra.keys() - set(self.extra_fields))}")
+        i = self.count % self.capacity
+        buffers = self.buffers
+        buffers["episode"][i] = self.count + 1
+        buffers["reward"][i] = reward
+        buffers["steps"][i] = steps
+        buffers["epsilon"][i] = epsilon
+        buffers["loss"][i] = np.nan if loss is None else loss
+        buffers["wall_time"][i] = time.perf_counter() - self.start_time
+        for field in self.extra_fields:
+            buffers[field][i] = extra.get(field, np.nan)
+        self.count += 1
+        self.total_steps += steps
+
+        if self.path is not None and self.count - self.flushed >= self.flush_every:
+            self.flush()
+        now = time.perf_counter()
+        if now - self._last_summary >= self.summary_seconds:
+            self.print_summary(now)
+
+    def recent(self, n=None):
+        """The last n (default: all buffered) episodes as a dict of arrays, oldest first."""
+        n = min(self.count, self.capacity) if n is None else min(n, self.count, self.capacity)
+        index = np.arange(self.count - n, self.count) % self.capacity
+        return {field: buffer[index] for field, buffer in self.buffers.items()}
+
+    def print_summary(self, now=None):
+        # Throughput since the previous summary plus the mean reward of those episodes
+        now = time.perf_counter() if now is None else now
+        elapsed = max(now - self._last_summary, 1e-9)
+        episodes = self.count - self._summary_count
+        steps = self.total_steps - self._summary_steps
+        window = self.recent(max(episodes, 1))
+        summary = (f"{self.name}: episode {self.count}, {episodes / elapsed:.1f} episodes/s, "
+                   f"{steps / elapsed:.0f} steps/s, mean reward {np.nanmean(window['reward']):.2f}")
+        if not np.all(np.isnan(window["epsilon"])):
+            summary += f", epsilon {window['epsilon'][-1]:.3f}"
+        if not np.all(np.isnan(window["loss"])):
+            summary += f", loss {np.nanmean(window['loss']):.4f}"
+        for field in self.extra_fields:
+            if not np.isnan(window[field][-1]):
+                summary += f", {field} {window[field][-1]:.4g}"
+        print(summary)
+        self._last_summary = now
+        self._summary_count = self.count
+        self._summary_steps = self.total_steps
+
+    def flush(self):
+        """Hand every row logged since the last flush to the writer."""
+        pending = self.count - self.flushed
+        if self.path is None or pending == 0:
+            return
+        if pending > self.capacity:
+            # The ring wrapped before a flush: the oldest rows are gone
+            pending = self.capacity
+        rows = self.recent(pending)
+        self.flushed = self.count
+        if self._queue is not None:
+            self._queue.put(rows)
+        else:
+            self._write(rows)
+
+    def _write_loop(self):
+        while True:
+            rows = self._queue.get()
+            if rows is None:
+                break
+            self._write(rows)
+
+    def _write(self, rows):
+        if self.fmt == "npz":
+            base = os.path.splitext(self.path)[0]
+            np.savez(f"{base}_{self._chunk:05d}.npz", **rows)
+            self._chunk += 1
+            return
+        columns = [rows[field].tolist() for field in self.fields]
+        with open(self.path, "a", newline="") as f:
+            if self.fmt == "jsonl":
+                for values in zip(*columns):
+                    # NaN (a field not logged for this episode) becomes null
+                    record = {field: (None if value != value else value) for field, value in zip(self.fields, values)}
+                    f.write(json.dumps(record) + "\n")
+            else:
+                writer = csv.writer(f)
+                if f.tell() == 0:
+                    writer.writerow(self.fields)
+                writer.writerows(zip(*columns))
+
+    def close(self):
+        """Flush the remaining rows, wait for the writer and print a final summary."""
+        self.flush()
+        if self._queue is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._queue = None
+        if self.count > self._summary_count:
+            self.print_summary()
+        elapsed = time.perf_counter() - self.start_time
+        print(f"{self.name}: {self.count} episodes in {elapsed:.1f}s "
+              f"({self.count / max(elapsed, 1e-9):.1f} episodes/s, {self.total_steps / max(elapsed, 1e-9):.0f} steps/s)")
@@ -0,0 +1,262 @@
+# q_store.py
+import os
+from multiprocessing import shared_memory
+import numpy as np
+
+EMPTY = -1
+MAX_LOAD = 0.7          # Grow (or evict) once the table is this full
+EVICT_FRACTION = 0.25   # Share of entries dropped when the memory cap is reached
+_HASH_MULT = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+# Keys are visited_mask * num_cities + current_city in int64: the largest,
+# num_cities * 2**num_cities - 1, fits up to this many cities
+MAX_CITIES = 57
+
+def _check_num_cities(num_cities):
+    if not 0 < num_cities <= MAX_CITIES:
+        raise ValueError(f"Q-store keys cover 1 to {MAX_CITIES} cities, got {num_cities}")
+
+class SparseQTable:
+    """
+    Lazily allocated Q-store for the tabular TSP agent.
+    An open-addressing (linear probing) hash table over NumPy arrays maps the
+    key of a (current_city, visited_mask) state to a float32 row of Q-values.
+    Rows only exist for states that have been written, the table doubles in
+    size as it fills, and once it reaches max_bytes the least recently used
+    (eviction="lru") or least visited (eviction="visits") entries are dropped.
+    """
+    def __init__(self, num_cities, max_bytes=256 * 2**20, eviction="lru",
+                 initial_capacity=1 << 12, dtype=np.float32, num_actions=None):
+        if eviction not in ("lru", "visits"):
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        _check_num_cities(num_cities)
+        self.num_cities = num_cities
+        # Row width: one Q-value per city, or per candidate slot with candidate lists
+        self.num_actions = num_actions or num_cities
+        self.eviction = eviction
+        self.dtype = np.dtype(dtype)
+        slot_bytes = 8 + 8 + 4 + self.dtype.itemsize * self.num_actions
+        # Largest power-of-two capacity that fits in max_bytes
+        self.max_capacity = 1 << max(int(max_bytes // slot_bytes).bit_length() - 1, 4)
+        self.clock = 0
+        self._allocate(min(initial_capacity, self.max_capacity))
+
+    def _allocate(self, capacity):
+        self.keys = np.full(capacity, EMPTY, dtype=np.int64)
+        self.values = np.zeros((capacity, self.num_actions), dtype=self.dtype)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.visits = np.zeros(capacity, dtype=np.int32)
+        self._set_capacity(capacity)
+
+    def _set_capacity(self, capacity):
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self.size = int(np.count_nonzero(self.keys != EMPTY))
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes + self.last_used.nbytes + self.visits.nbytes
+
+    def _key(self, state):
+        # Python ints, so NumPy integer states don't overflow int64 in the hash multiply
+        current_city, visited_mask = state
+        return int(visited_mask) * self.num_cities + int(current_city)
+
+    def _slot(self, key):
+        # Fibonacci hashing followed by linear probing; returns the key's slot or the empty slot ending its probe
+        slot = ((key * _HASH_MULT) & _MASK64) >> self._shift
+        keys = self.keys
+        while True:
+            k = keys[slot]
+            if k == key or k == EMPTY:
+                return slot
+            slot = (slot + 1) & self._mask
+
+    def get(self, state):
+        """Return the Q-value row of state (a view), or None if it was never written."""
+        slot = self._slot(self._key(state))
+        if self.keys[slot] == EMPTY:
+            return None
+        if self.last_used.flags.writeable:
+            self.clock += 1
+            self.last_used[slot] = self.clock
+        return self.values[slot]
+
+    def set(self, state, action, value):
+        """Write Q(state, action), allocating a zero row for a new state."""
+        key = self._key(state)
+        slot = self._slot(key)
+        if self.keys[slot] == EMPTY:
+            if self.size + 1 > MAX_LOAD * self.capacity:
+                self._make_room()
+                slot = self._slot(key)
+            self.keys[slot] = key
+            self.size += 1
+        self.clock += 1
+        self.last_used[slot] = self.clock
+        self.visits[slot] += 1
+        self.values[slot, action] = value
+
+    def _make_room(self):
+        used = np.flatnonzero(self.keys != EMPTY)
+        if self.capacity < self.max_capacity:
+            capacity = self.capacity * 2
+        else:
+            # At the memory cap: keep the most recently used / most visited entries
+            if self.eviction == "lru":
+                order = np.argsort(self.last_used[used])
+            else:
+                order = np.lexsort((self.last_used[used], self.visits[used]))
+            used = used[order[int(len(used) * EVICT_FRACTION):]]
+            capacity = self.capacity
+        entries = (self.keys[used], self.values[used], self.last_used[used], self.visits[used])
+        self._allocate(capacity)
+        self._insert_many(*entries)
+
+    def _insert_many(self, keys, values, last_used, visits):
+        # Vectorized rehash: each round places one key per free slot, the rest probe one slot further
+        slots = ((keys.astype(np.uint64) * np.uint64(_HASH_MULT)) >> np.uint64(self._shift)).astype(np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            free = self.keys[slots[pending]] == EMPTY
+            candidates = pending[free]
+            _, first = np.unique(slots[candidates], return_index=True)
+            winners = candidates[first]
+            target = slots[winners]
+            self.keys[target] = keys[winners]
+            self.values[target] = values[winners]
+            self.last_used[target] = last_used[winners]
+            self.visits[target] = visits[winners]
+            placed = np.zeros(len(keys), dtype=bool)
+            placed[winners] = True
+            pending = pending[~placed[pending]]
+            slots[pending] = (slots[pending] + 1) & self._mask
+        self.size = int(np.count_nonzero(self.keys != EMPTY))
+
+    def _paths(self, path):
+        base = os.path.splitext(path)[0]
+        return {"values": path, "keys": base + "_keys.npy",
+                "last_used": base + "_last_used.npy", "visits": base + "_visits.npy"}
+
+    def save(self, path):
+        """Write the hash table arrays as .npy files: Q-values to path, the rest next to it."""
+        for name, file_path in self._paths(path).items():
+            array = getattr(self, name)
+            if isinstance(array, np.memmap) and os.path.exists(file_path) \
+                    and os.path.samefile(array.filename, file_path):
+                array.flush()
+                continue
+            # Write to a temporary file first so existing read-only maps stay valid
+            with open(file_path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(file_path + ".tmp", file_path)
+
+    def load(self, path, mmap_mode="r"):
+        """Memory-map saved arrays; lookups work directly on the map without a rebuild."""
+        arrays = {name: np.load(file_path, mmap_mode=mmap_mode) for name, file_path in self._paths(path).items()}
+        if arrays["values"].shape[1] != self.num_actions:
+            raise ValueError(f"{path} holds Q-rows of {arrays['values'].shape[1]} actions, expected {self.num_actions}")
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self._set_capacity(len(self.keys))
+        self.max_capacity = max(self.max_capacity, self.capacity)
+        self.clock = int(self.last_used.max(initial=0))
+
+class SharedSparseQTable(SparseQTable):
+    """
+    SparseQTable whose arrays live in one multiprocessing.shared_memory block so
+    several worker processes can update it at once (Hogwild-style, without locks).
+    The capacity is fixed when the block is created: the table never grows or
+    evicts, and raises RuntimeError once it is full. Racing writers may
+    occasionally lose an update or claim the same empty slot; like Hogwild SGD,
+    training tolerates this in exchange for lock-free updates.
+    """
+    def __init__(self, num_cities, max_bytes=256 * 2**20, dtype=np.float32, num_actions=None, name=None):
+        _check_num_cities(num_cities)
+        self.num_cities = num_cities
+        self.num_actions = num_actions or num_cities
+        self.eviction = "lru"
+        self.dtype = np.dtype(dtype)
+        slot_bytes = 8 + 8 + 4 + self.dtype.itemsize * self.num_actions
+        capacity = 1 << max(int(max_bytes // slot_bytes).bit_length() - 1, 4)
+        self.max_capacity = capacity
+        self.clock = 0
+        self._layout = [("keys", np.int64, (capacity,)), ("last_used", np.int64, (capacity,)),
+                        ("visits", np.int32, (capacity,)), ("values", self.dtype, (capacity, self.num_actions))]
+        nbytes = 8 + sum(np.dtype(d).itemsize * int(np.prod(s)) for _, d, s in self._layout)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=nbytes if self.owner else 0)
+        self._map_arrays()
+        if self.owner:
+            self.keys[:] = EMPTY
+            self.values[:] = 0
+            self.last_used[:] = 0
+            self.visits[:] = 0
+            self._count[0] = 0
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._shift = 64 - (capacity.bit_length() - 1)
+
+    def _map_arrays(self):
+        # The first 8 bytes hold the shared entry count, the arrays follow back to back
+        self._count = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        offset = 8
+        for attr, dtype, shape in self._layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, attr, array)
+            offset += array.nbytes
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def size(self):
+        # Approximate under concurrent inserts, which is enough for the load check
+        return int(self._count[0])
+
+    @size.setter
+    def size(self, value):
+        self._count[0] = value
+
+    @property
+    def spec(self):
+        """Constructor arguments that open this same block in another process: SharedSparseQTable(**spec)."""
+        return {"num_cities": self.num_cities, "max_bytes": self.nbytes, "dtype": self.dtype.str,
+                "num_actions": self.num_actions, "name": self.name}
+
+    def _make_room(self):
+        self.size = int(np.count_nonzero(self.keys != EMPTY))
+        if self.size + 1 > MAX_LOAD * self.capacity:
+            raise RuntimeError(f"shared Q-table is full ({self.size} states); raise its max_bytes")
+
+    def copy_from(self, table):
+        """Insert every entry of a SparseQTable (e.g. a loaded one) into this shared table."""
+        used = np.flatnonzero(table.keys != EMPTY)
+        if len(used) > MAX_LOAD * self.capacity:
+            raise RuntimeError(f"{len(used)} states do not fit into the shared Q-table")
+        self._insert_many(np.asarray(table.keys[used]), np.asarray(table.values[used]),
+                          np.asarray(table.last_used[used]), np.asarray(table.visits[used]))
+
+    def to_sparse(self, max_bytes=256 * 2**20, eviction="lru"):
+        """Copy the entries into a regular, process-local SparseQTable."""
+        table = SparseQTable(self.num_cities, max_bytes=max(max_bytes, self.nbytes), eviction=eviction,
+                             initial_capacity=self.capacity, dtype=self.dtype, num_actions=self.num_actions)
+        used = np.flatnonzero(self.keys != EMPTY)
+        table._insert_many(self.keys[used].copy(), self.values[used].copy(),
+                           self.last_used[used].copy(), self.visits[used].copy())
+        table.clock = int(self.last_used.max(initial=0))
+        return table
+
+    def close(self):
+        """Release this process's mapping; the creating process also frees the block."""
+        for attr, _, _ in self._layout:
+            setattr(self, attr, None)
+        self._count = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,70 @@
+# tabular_main.py
+import os
+import sys
+import pygame
+import config
+from tsp_env import TSPEnv
+from agent import Agent
+from hogwild_trainer import HogwildTrainer
+from trainer import Trainer
+from tsp_solvers import tour_length
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
+    pygame.display.set_caption("TSP Tabular Q-learning")
+    clock = pygame.time.Clock()
+
+    env = TSPEnv(candidate_k=config.CANDIDATE_K)
+    agent = Agent(env)
+
+    # Resume from a saved Q-table, or map it read-only to skip straight to the demo
+    loaded = False
+    if os.path.exists(config.Q_TABLE_PATH):
+        try:
+            metadata = agent.load(config.Q_TABLE_PATH, mmap_mode="r+" if config.TRAIN_ON_LAUNCH else "r")
+            loaded = True
+            print(f"Loaded Q-table trained for {metadata['episodes']} episodes from {config.Q_TABLE_PATH}")
+        except (OSError, ValueError) as e:
+            print("Failed to load the saved Q-table, starting fresh.", e)
+
+    trainer = Trainer(agent, env)
+    if config.TRAIN_ON_LAUNCH or not loaded:
+        if config.USE_HOGWILD:
+            # Parallel, headless training; the shared Q-table is copied back into the agent
+            HogwildTrainer(agent, env).train()
+        else:
+            trainer.train(screen, clock)
+        agent.save(config.Q_TABLE_PATH)
+
+    # Demonstration: disable exploration and show the learned route
+    print("Now demonstrating the learned route...")
+    agent.epsilon = 0
+    state = env.reset()
+    done = False
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+
+        action = agent.choose_action(state)
+        state, reward, done = env.step(state, action)
+        env.render(screen)
+        clock.tick(config.CLOCK_TICK_DEMO)
+
+    length = tour_length(env.route, env.distances)
+    print(f"Route length: {length:.1f} (gap {trainer.gap(length):.1%} to the {trainer.reference_name()})")
+    # Final output: the learned route polished by 2-opt / Or-opt
+    result = trainer.report_local_search(env.route)
+    print("Improved route:", result["tour"])
+    print("Route complete! Press the close button to exit.")
+    # Keep the window open until closed by the user
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+
+if __name__ == '__main__':
+    main()
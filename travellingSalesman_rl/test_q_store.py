@@ -0,0 +1,10 @@
+# test_q_store.py
+import numpy as np
+from q_store import SparseQTable
+
+def test_numpy_integer_states_match_python_ints():
+    table = SparseQTable(20)
+    table.set((np.int64(3), np.int64(5)), 2, 1.5)
+    assert table.get((3, 5))[2] == 1.5
+    assert table.get((np.int64(3), np.uint32(5)))[2] == 1.5
+    assert table.get((np.int64(4), np.int64(5))) is None
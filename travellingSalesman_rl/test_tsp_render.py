@@ -0,0 +1,29 @@
+# test_tsp_render.py
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+import config
+from tsp_dataset import TSPDataset, generate_instances
+from tsp_env import TSPEnv
+from tsp_gym_env import TSPGymEnv
+
+def _stream(tmp_path):
+    generate_instances(str(tmp_path), 4, seed=0, shard_size=2)
+    return TSPDataset(str(tmp_path)).stream(seed=0)
+
+def test_tsp_env_renders_dataset_instances(tmp_path):
+    pygame.init()
+    screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
+    env = TSPEnv(instances=_stream(tmp_path))
+    state = env.reset()
+    env.render(screen)
+    env.step(state, 1)
+    env.render(screen)
+
+def test_tsp_gym_env_renders_dataset_instances(tmp_path):
+    env = TSPGymEnv(instances=_stream(tmp_path))
+    env.reset()
+    env.render()
+    env.step(0 if env.candidates is not None else 1)
+    env.render()
+    env.close()
@@ -0,0 +1,11 @@
+# test_tsp_trainer.py
+from agent import Agent
+from metrics import MetricsLogger
+from trainer import Trainer
+from tsp_env import TSPEnv
+
+def test_trainer_accepts_logger_without_extra_fields():
+    env = TSPEnv()
+    metrics = MetricsLogger(name="bare")
+    Trainer(Agent(env), env, num_episodes=20, metrics=metrics).train()
+    assert metrics.count == 20
@@ -1,16 +1,88 @@
 # trainer.py
+import math
 import pygame
 import sys
 import config
+from local_search import improve_with_report
+from metrics import MetricsLogger
+from tsp_solvers import HELD_KARP_MAX_CITIES, held_karp, nearest_neighbour_tour, tour_length
+
+def log_episode(metrics, reward, steps, epsilon, **extra):
+    # Log only the extra fields the logger has columns for, so a caller's logger never breaks training
+    metrics.log(reward, steps, epsilon=epsilon,
+                **{field: value for field, value in extra.items() if field in metrics.extra_fields})
+
+def greedy_tour(agent, env):
+    """Route of the agent's greedy policy (exploration off) and its length, or (inf, route) if it gets stuck."""
+    epsilon, agent.epsilon = agent.epsilon, 0
+    state = env.reset()
+    done = False
+    while not done:
+        action = agent.choose_action(state)
+        if action is None:
+            break
+        state, _, done = env.step(state, action)
+    agent.epsilon = epsilon
+    return (tour_length(env.route, env.distances) if done else float("inf")), list(env.route)
 
 class Trainer:
-    def __init__(self, agent, env, num_episodes=config.NUM_EPISODES):
+    """
+    Tabular Q-learning on env, logging each finished tour's length and its gap to
+    the instance's optimum (or nearest-neighbour tour when no optimum is known).
+    Held-Karp only runs with solve_optimum, for instances that carry no optimum.
+    With an env that streams instances the references follow the current instance.
+    """
+    def __init__(self, agent, env, num_episodes=config.NUM_EPISODES, metrics=None,
+                 solve_optimum=config.SOLVE_OPTIMUM):
         self.agent = agent
         self.env = env
         self.num_episodes = num_episodes
+        self.metrics = metrics
+        self.solve_optimum = solve_optimum
+        self._distances = None
+        self._sync_instance()
+
+    def _sync_instance(self):
+        # Reference tours belong to one instance: recompute them when the env has moved on to another
+        if self._distances is self.env.distances:
+            return
+        self._distances = self.env.distances
+        self.baseline_length, _ = nearest_neighbour_tour(self._distances)
+        optimal = self.env.optimal_length
+        self._optimal_length = None if optimal is None or math.isnan(optimal) else float(optimal)
+        # Streamed instances only use the optimum they come with: Held-Karp per episode would dominate training
+        self._optimal_solved = (self._optimal_length is not None or self.env.instances is not None
+                                or not self.solve_optimum)
+
+    @property
+    def optimal_length(self):
+        # With solve_optimum, Held-Karp is solved on first use and cached for the instance
+        self._sync_instance()
+        if not self._optimal_solved:
+            if self.env.num_cities <= HELD_KARP_MAX_CITIES:
+                self._optimal_length, _ = held_karp(self.env.distances)
+            self._optimal_solved = True
+        return self._optimal_length
+
+    def reference_length(self):
+        # What gaps on the current instance are measured against
+        return self.optimal_length or self.baseline_length
+
+    def reference_name(self):
+        return "optimum" if self.optimal_length else "nearest neighbour"
     
-    def train(self, screen, clock):
+    def gap(self, length, reference=None):
+        # Relative excess over reference, by default the current instance's reference_length()
+        return length / (reference or self.reference_length()) - 1
+    
+    def train(self, screen=None, clock=None):
+        """Train for num_episodes; without a screen the run is headless (no events, no rendering)."""
         print("Training TSP RL Agent...")
+        # Best tour by gap, with the instance it was found on (they differ when the env streams instances)
+        best = None
+        metrics = self.metrics or MetricsLogger(config.METRICS_PATH, config.METRICS_FORMAT,
+                                                summary_seconds=config.METRICS_SUMMARY_SECONDS,
+                                                extra_fields=("tour_length", "gap"), name="TSP")
         for episode in range(self.num_episodes):
             state = self.env.reset()
             total_reward = 0
@@ -18,10 +90,11 @@ class Trainer:
             steps = 0
             
             while not done and steps < config.MAX_STEPS + 1:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        sys.exit()
+                if screen is not None:
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            pygame.quit()
+                            sys.exit()
                 
                 action = self.agent.choose_action(state)
                 if action is None:
@@ -33,8 +106,39 @@ class Trainer:
                 total_reward += reward
                 steps += 1
             
-            print(f"Episode {episode+1}/{self.num_episodes}, Total Reward: {total_reward:.2f}")
+            self.agent.episodes_trained += 1
+            tour = {}
+            if done:
+                length = tour_length(self.env.route, self.env.distances)
+                reference = self.reference_length()
+                gap = self.gap(length, reference)
+                if best is None or gap < best["gap"]:
+                    best = {"gap": gap, "length": length, "route": list(self.env.route),
+                            "distances": self.env.distances, "reference": reference,
+                            "baseline": self.baseline_length, "optimal": self.optimal_length,
+                            "reference_name": self.reference_name()}
+                tour = {"tour_length": length, "gap": gap}
+            log_episode(metrics, total_reward, steps, self.agent.epsilon, **tour)
             # Optionally render the environment every 100 episodes to see progress
-            if (episode + 1) % 100 == 0:
+            if screen is not None and (episode + 1) % 100 == 0:
                 self.env.render(screen)
                 pygame.time.wait(500)
+        
+        metrics.close()
+        if best is None:
+            print("No tour completed.")
+            return
+        print(f"Best tour: {best['length']:.1f} (gap {best['gap']:.1%} to the {best['reference_name']}), "
+              f"nearest neighbour: {best['baseline']:.1f}, optimal: "
+              + (f"{best['optimal']:.1f}" if best['optimal'] else "n/a"))
+        self.report_local_search(best["route"], best["distances"], best["reference"])
+
+    def report_local_search(self, route, distances=None, reference=None):
+        """
+        Post-process a route with 2-opt / Or-opt and report what it bought and cost.
+        distances and reference default to the env's current instance.
+        """
+        result = improve_with_report(route, self.env.distances if distances is None else distances)
+        print(f"After local search: {result['length']:.1f} (gap {self.gap(result['length'], reference):.1%}), "
+              f"{result['improvement']:.1%} shorter in {result['time_ms']:.1f} ms")
+        return result
@@ -0,0 +1,119 @@
+# tsp_dataset.py
+import json
+import os
+import numpy as np
+import config
+from tsp_solvers import HELD_KARP_MAX_CITIES, held_karp
+
+MANIFEST = "manifest.json"
+# Instances per chunk when computing distance matrices (bounds the temporary memory)
+CHUNK_SIZE = 256
+
+def _shard_paths(path, shard):
+    base = os.path.join(path, f"shard_{shard:05d}")
+    return {"coords": base + "_coords.npy", "distances": base + "_dist.npy", "optimal": base + "_optimal.npy"}
+
+def generate_instances(path, num_instances, num_cities=config.NUM_CITIES, seed=0,
+                       shard_size=config.DATASET_SHARD_SIZE, with_optimum=False):
+    """
+    Write num_instances random TSP instances to path as .npy shards of shard_size
+    instances: city coordinates (float32, shard x n x 2, drawn like config.CITIES),
+    distance matrices (float32, shard x n x n) and, with with_optimum, Held-Karp
+    optimal tour lengths (NaN otherwise). Every shard has its own seed derived
+    from seed, so the same arguments always give the same dataset.
+    """
+    if with_optimum and num_cities > HELD_KARP_MAX_CITIES:
+        raise ValueError(f"optimal lengths need at most {HELD_KARP_MAX_CITIES} cities")
+    os.makedirs(path, exist_ok=True)
+    num_shards = -(-num_instances // shard_size)
+    shard_seeds = np.random.SeedSequence(seed).spawn(num_shards)
+    low = np.array([50, 50])
+    high = np.array([config.WIDTH - 50, config.HEIGHT - 50])
+    shards = []
+    for shard, shard_seed in enumerate(shard_seeds):
+        size = min(shard_size, num_instances - shard * shard_size)
+        rng = np.random.default_rng(shard_seed)
+        paths = _shard_paths(path, shard)
+        # Arrays are written through memory maps, so a shard never has to fit in RAM twice
+        coords = np.lib.format.open_memmap(paths["coords"], mode="w+", dtype=np.float32, shape=(size, num_cities, 2))
+        distances = np.lib.format.open_memmap(paths["distances"], mode="w+", dtype=np.float32,
+                                              shape=(size, num_cities, num_cities))
+        optimal = np.lib.format.open_memmap(paths["optimal"], mode="w+", dtype=np.float32, shape=(size,))
+        coords[:] = rng.integers(low, high, size=(size, num_cities, 2), endpoint=True)
+        for start in range(0, size, CHUNK_SIZE):
+            chunk = coords[start:start + CHUNK_SIZE].astype(np.float64)
+            diff = chunk[:, :, None, :] - chunk[:, None, :, :]
+            distances[start:start + CHUNK_SIZE] = np.hypot(diff[..., 0], diff[..., 1])
+        optimal[:] = np.nan
+        if with_optimum:
+            for i in range(size):
+                optimal[i], _ = held_karp(distances[i])
+        for array in (coords, distances, optimal):
+            array.flush()
+        shards.append(size)
+
+    manifest = {"num_cities": num_cities, "seed": seed, "shard_sizes": shards,
+                "width": config.WIDTH, "height": config.HEIGHT, "with_optimum": with_optimum}
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return TSPDataset(path)
+
+class TSPDataset:
+    """
+    Read side of generate_instances(): shards are memory-mapped, so instances
+    are paged in from disk on access instead of being regenerated or loaded up front.
+    """
+    def __init__(self, path, mmap_mode="r"):
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.path = path
+        self.num_cities = self.manifest["num_cities"]
+        self.shard_sizes = self.manifest["shard_sizes"]
+        self._offsets = np.concatenate([[0], np.cumsum(self.shard_sizes)])
+        self.shards = []
+        for shard in range(len(self.shard_sizes)):
+            paths = _shard_paths(path, shard)
+            self.shards.append({name: np.load(file_path, mmap_mode=mmap_mode) for name, file_path in paths.items()})
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def instance(self, index):
+        """(coords, distances, optimal length or NaN) of one instance."""
+        shard = int(np.searchsorted(self._offsets, index, side="right")) - 1
+        i = index - self._offsets[shard]
+        arrays = self.shards[shard]
+        return arrays["coords"][i], arrays["distances"][i], float(arrays["optimal"][i])
+
+    def batches(self, batch_size, shuffle=False, seed=None):
+        """
+        Yield (coords, distances, optimal) arrays of up to batch_size instances,
+        one shard at a time. With shuffle, shard order and the order within each
+        shard are permuted; each batch is then gathered from a single shard.
+        """
+        rng = np.random.default_rng(seed)
+        shard_order = rng.permutation(len(self.shards)) if shuffle else range(len(self.shards))
+        for shard in shard_order:
+            arrays = self.shards[shard]
+            size = self.shard_sizes[shard]
+            order = rng.permutation(size) if shuffle else None
+            for start in range(0, size, batch_size):
+                if shuffle:
+                    # Sorted within the batch so the gather reads the map front to back
+                    index = np.sort(order[start:start + batch_size])
+                else:
+                    index = slice(start, start + batch_size)
+                yield arrays["coords"][index], arrays["distances"][index], arrays["optimal"][index]
+
+    def stream(self, seed=None, shuffle=True):
+        """Endless iterator of single instances for environments to reset into, epoch after epoch."""
+        seed_sequence = np.random.SeedSequence(seed)
+        while True:
+            epoch_seed, = seed_sequence.spawn(1)
+            for coords, distances, optimal in self.batches(config.DATASET_BATCH_SIZE, shuffle, epoch_seed):
+                for i in range(len(coords)):
+                    yield coords[i], distances[i], float(optimal[i])
+
+if __name__ == '__main__':
+    dataset = generate_instances(config.DATASET_PATH, config.DATASET_SIZE, seed=config.DATASET_SEED)
+    print(f"Wrote {len(dataset)} instances of {dataset.num_cities} cities to {config.DATASET_PATH}")
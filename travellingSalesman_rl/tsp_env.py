@@ -1,21 +1,50 @@
 # tsp_env.py
-import math
 import pygame
 import config
+from tsp_render import RouteRenderer
+from tsp_solvers import distance_matrix
+from action_mask import action_masker, candidate_actions
 
 class TSPEnv:
-    def __init__(self, cities=config.CITIES):
-        self.cities = cities
-        self.num_cities = config.NUM_CITIES
+    def __init__(self, cities=config.CITIES, instances=None, candidate_k=None):
+        """
+        instances: optional iterator of (coords, distances, optimal) tuples, e.g.
+        TSPDataset.stream(); every reset then moves on to the next instance.
+        candidate_k: size of the K-nearest candidate lists agents may prune actions to (None: all cities).
+        """
+        self.num_cities = len(cities)
+        self.candidate_k = candidate_k
+        self.masker = action_masker(self.num_cities)
+        self.renderer = RouteRenderer(cities)
+        self.instances = instances
+        self.set_instance(cities)
         self.reset()
-    
+
+    def set_instance(self, cities, distances=None, optimal_length=None):
+        """Switch to another instance with the same number of cities."""
+        if len(cities) != self.num_cities:
+            raise ValueError(f"expected {self.num_cities} cities, got {len(cities)}")
+        self.cities = cities
+        self.distances = distance_matrix(cities) if distances is None else distances
+        self.optimal_length = optimal_length
+        # K-nearest candidate lists for agents that prune the action space (None = all cities)
+        self.candidates = candidate_actions(self.distances, self.candidate_k)
+        self.renderer.set_cities(cities)
+
     def reset(self):
+        if self.instances is not None:
+            coords, distances, optimal_length = next(self.instances)
+            self.set_instance(coords, distances, optimal_length)
         # Start at city 0; visited_mask with bit 0 set indicates city 0 is visited.
         self.current_city = 0
         self.visited_mask = 1  # (binary 000...001)
         self.route = [0]       # Record the route taken
         return (self.current_city, self.visited_mask)
     
+    def action_mask(self, state):
+        # Boolean mask of the cities that can still be chosen from state
+        return self.masker.valid(state[1])
+    
     def step(self, state, action):
         """
         Executes an action (choosing the next city).
@@ -30,8 +59,7 @@ class TSPEnv:
             return state, -100, False  # Invalid move
         
         # Calculate distance from current city to the selected city
-        dist = self._distance(self.cities[current_city], self.cities[action])
-        reward = -dist
+        reward = -float(self.distances[current_city, action])
         
         # Update the visited mask and route
         new_visited_mask = visited_mask | (1 << action)
@@ -41,8 +69,7 @@ class TSPEnv:
         # Check if all cities have been visited
         if new_visited_mask == (1 << self.num_cities) - 1:
             # Add cost for returning to the starting city (city 0)
-            return_dist = self._distance(self.cities[action], self.cities[0])
-            reward += -return_dist
+            reward += -float(self.distances[action, 0])
             done = True
             new_state = None  # Terminal state
             self.route.append(0)  # Complete the tour by returning to start
@@ -51,25 +78,6 @@ class TSPEnv:
         
         return new_state, reward, done
     
-    def _distance(self, city1, city2):
-        x1, y1 = city1
-        x2, y2 = city2
-        return math.hypot(x2 - x1, y2 - y1)
-    
     def render(self, screen):
-        # Clear screen
-        screen.fill((255, 255, 255))
-        
-        # Draw each city as a blue circle with its index
-        for idx, (x, y) in enumerate(self.cities):
-            pygame.draw.circle(screen, (0, 0, 255), (x, y), 8)
-            font = pygame.font.SysFont(None, 24)
-            text = font.render(str(idx), True, (0, 0, 0))
-            screen.blit(text, (x - 10, y - 10))
-        
-        # Draw the route taken so far (if any)
-        if len(self.route) > 1:
-            points = [self.cities[i] for i in self.route]
-            pygame.draw.lines(screen, (255, 0, 0), False, points, 2)
-        
-        pygame.display.flip()
+        # Static cities come from the render cache; only new route segments are drawn
+        pygame.display.update(self.renderer.draw(screen, self.route))
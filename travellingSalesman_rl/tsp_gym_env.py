@@ -2,50 +2,158 @@
 
 import gymnasium as gym
 from gymnasium import spaces
-import math
+import numpy as np
 import pygame
 import config
+from tsp_render import RouteRenderer
+from tsp_solvers import distance_matrix
+from action_mask import action_masker, candidate_actions
+
+OBSERVATION_MODES = ("discrete", "multibinary")
+INVALID_ACTION_MODES = ("penalise", "remap")
+
+def make_observation_space(num_cities, observation_mode, city_features):
+    """Dict observation space shared by TSPGymEnv and TSPVecEnv."""
+    if observation_mode == "discrete":
+        # Note: SB3 one-hot encodes this into a 2^num_cities wide input
+        return spaces.Dict({
+            'current_city': spaces.Discrete(num_cities),
+            'visited_mask': spaces.Discrete(1 << num_cities)
+        })
+    obs_spaces = {
+        'current_city': spaces.Discrete(num_cities),
+        'visited': spaces.MultiBinary(num_cities)
+    }
+    if city_features:
+        obs_spaces['city_features'] = spaces.Box(0.0, 1.0, shape=(num_cities, 3), dtype=np.float32)
+    return spaces.Dict(obs_spaces)
+
+def normalised_coords(cities):
+    # City coordinates scaled to [0, 1] by the window size
+    coords = np.asarray(cities, dtype=np.float32)
+    return coords / np.array([config.WIDTH, config.HEIGHT], dtype=np.float32)
 
 class TSPGymEnv(gym.Env):
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, observation_mode="discrete", city_features=False,
+                 invalid_actions="penalise", candidate_k=None, instances=None):
+        """
+        observation_mode: "discrete" encodes visited cities as one Discrete(2^n) bitmask,
+        "multibinary" as a MultiBinary(n) vector. With city_features (multibinary only)
+        the observation also holds a Box of per-city features: normalised x, y and
+        distance from the current city.
+        invalid_actions: "penalise" answers an already visited city with a -100 reward
+        and no move, "remap" sends the agent to the nearest unvisited city instead.
+        candidate_k: when set, actions are slots into the current city's candidate_k
+        nearest neighbours plus a fallback slot (see CandidateActions).
+        instances: optional iterator of (coords, distances, optimal) tuples, e.g.
+        TSPDataset.stream(); every reset then moves on to the next instance.
+        reset(options={"instance": (coords, distances)}) switches instance explicitly.
+        """
         super().__init__()
-        self.cities = config.CITIES
+        if observation_mode not in OBSERVATION_MODES:
+            raise ValueError(f"Unknown observation mode: {observation_mode}")
+        if invalid_actions not in INVALID_ACTION_MODES:
+            raise ValueError(f"Unknown invalid action handling: {invalid_actions}")
+        self.invalid_actions = invalid_actions
+        self.observation_mode = observation_mode
+        self.city_features = city_features and observation_mode == "multibinary"
+        self.candidate_k = candidate_k
+        self.instances = instances
         self.num_cities = config.NUM_CITIES
+        self.masker = action_masker(self.num_cities)
+        self.renderer = RouteRenderer(config.CITIES)
+        self.set_instance(config.CITIES)
 
-        # Action space: choose one of the cities
-        self.action_space = spaces.Discrete(self.num_cities)
-        
-        # Observation space as a Dict: current city and visited mask
-        self.observation_space = spaces.Dict({
-            'current_city': spaces.Discrete(self.num_cities),
-            'visited_mask': spaces.Discrete(1 << self.num_cities)
-        })
+        # Action space: choose one of the cities, or one of the candidate slots
+        self.action_space = spaces.Discrete(self.candidates.num_actions if self.candidates else self.num_cities)
         
+        # Observation space as a Dict: current city and visited cities
+        self.observation_space = make_observation_space(self.num_cities, observation_mode, self.city_features)
+
+        # Step counters for reporting how much of the training budget is spent usefully
+        self.total_steps = 0
+        self.useful_steps = 0
+        self.episodes_completed = 0
+
         self.reset()
 
+    def set_instance(self, cities, distances=None, optimal_length=None):
+        """Switch to another instance with the same number of cities."""
+        if len(cities) != self.num_cities:
+            raise ValueError(f"expected {self.num_cities} cities, got {len(cities)}")
+        self.cities = cities
+        self.distances = distance_matrix(cities) if distances is None else distances
+        self.optimal_length = optimal_length
+        self.candidates = candidate_actions(self.distances, self.candidate_k)
+        # Static part of the city features: coordinates scaled to [0, 1]
+        self._coords = normalised_coords(cities)
+        self._max_distance = float(self.distances.max()) or 1.0
+        self.renderer.set_cities(cities)
+
+    def _obs(self):
+        if self.observation_mode == "discrete":
+            return {'current_city': self.current_city, 'visited_mask': self.visited_mask}
+        obs = {
+            'current_city': self.current_city,
+            'visited': self.masker.visited(self.visited_mask).astype(np.int8)
+        }
+        if self.city_features:
+            distances = self.distances[self.current_city, :, None] / self._max_distance
+            obs['city_features'] = np.concatenate([self._coords, distances], axis=1)
+        return obs
+
     def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        if options and "instance" in options:
+            self.set_instance(*options["instance"])
+        elif self.instances is not None:
+            self.set_instance(*next(self.instances))
         self.current_city = 0
         self.visited_mask = 1  # only city 0 is visited (bitmask)
         self.route = [0]
         # Gymnasium's reset returns a tuple: (observation, info)
-        return {'current_city': self.current_city, 'visited_mask': self.visited_mask}, {}
+        return self._obs(), {'action_mask': self.action_masks()}
+
+    def action_masks(self):
+        # Boolean mask of the actions (cities or candidate slots) that can still be chosen
+        valid = self.masker.valid(self.visited_mask)
+        if self.candidates is not None:
+            return self.candidates.slot_mask(self.current_city, valid)
+        return valid
+
+    def _nearest_unvisited(self):
+        candidates = np.where(self.masker.valid(self.visited_mask), self.distances[self.current_city], np.inf)
+        return int(np.argmin(candidates))
+
+    def _slot_city(self, slot):
+        # City behind a candidate slot, or -1 if the slot is closed
+        valid = self.masker.valid(self.visited_mask)
+        if not self.candidates.slot_mask(self.current_city, valid)[slot]:
+            return -1
+        return self.candidates.cities(self.current_city, slot, valid)
 
     def step(self, action):
-        # Check for invalid move: city already visited
-        if self.visited_mask & (1 << action):
-            reward = -100  # Heavy penalty for invalid move
-            done = False
-            obs = {'current_city': self.current_city, 'visited_mask': self.visited_mask}
-            # Gymnasium's step returns: obs, reward, terminated, truncated, info
-            return obs, reward, done, False, {}
-        
-        # Calculate Euclidean distance as negative reward
-        x1, y1 = self.cities[self.current_city]
-        x2, y2 = self.cities[action]
-        dist = math.hypot(x2 - x1, y2 - y1)
-        reward = -dist
+        action = int(action)
+        if not 0 <= action < self.action_space.n:
+            raise ValueError(f"action {action} is outside the action space of {self.action_space.n} actions")
+        self.total_steps += 1
+        if self.candidates is not None:
+            action = self._slot_city(action)
+        # Check for invalid move: city already visited (or a closed candidate slot)
+        if action < 0 or self.visited_mask & (1 << action):
+            if self.invalid_actions == "remap":
+                action = self._nearest_unvisited()
+            else:
+                reward = -100  # Heavy penalty for invalid move
+                done = False
+                # Gymnasium's step returns: obs, reward, terminated, truncated, info
+                return self._obs(), reward, done, False, {'action_mask': self.action_masks()}
+        self.useful_steps += 1
+
+        # Negative Euclidean distance (from the precomputed distance matrix) as reward
+        reward = -float(self.distances[self.current_city, action])
 
         # Update state: mark action city as visited and move the current city
         self.visited_mask |= (1 << action)
@@ -55,17 +163,14 @@ class TSPGymEnv(gym.Env):
         # Check if all cities have been visited
         if self.visited_mask == (1 << self.num_cities) - 1:
             # Add penalty for returning to start
-            x_cur, y_cur = self.cities[self.current_city]
-            x0, y0 = self.cities[0]
-            return_dist = math.hypot(x_cur - x0, y_cur - y0)
-            reward += -return_dist
+            reward += -float(self.distances[self.current_city, 0])
             done = True
+            self.episodes_completed += 1
         else:
             done = False
 
-        obs = {'current_city': self.current_city, 'visited_mask': self.visited_mask}
         # Return truncated as False (you can modify if needed)
-        return obs, reward, done, False, {}
+        return self._obs(), reward, done, False, {'action_mask': self.action_masks()}
 
     def render(self, mode='human'):
         # Use pygame for rendering
@@ -73,21 +178,9 @@ class TSPGymEnv(gym.Env):
         if screen is None:
             pygame.init()
             screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT))
-        screen.fill((255, 255, 255))
-        
-        # Draw cities as blue circles with labels
-        for idx, (x, y) in enumerate(self.cities):
-            pygame.draw.circle(screen, (0, 0, 255), (x, y), 8)
-            font = pygame.font.SysFont(None, 24)
-            text = font.render(str(idx), True, (0, 0, 0))
-            screen.blit(text, (x - 10, y - 10))
-        
-        # Draw the route taken so far
-        if len(self.route) > 1:
-            points = [self.cities[i] for i in self.route]
-            pygame.draw.lines(screen, (255, 0, 0), False, points, 2)
-        
-        pygame.display.flip()
+
+        # Static cities come from the render cache; only new route segments are drawn
+        pygame.display.update(self.renderer.draw(screen, self.route))
 
     def close(self):
         pygame.quit()
@@ -0,0 +1,60 @@
+# tsp_render.py
+import pygame
+
+class RouteRenderer:
+    """
+    Render cache shared by TSPEnv and TSPGymEnv.
+    The cities and their labels are baked into a background surface once; each
+    frame only draws the route segments added since the previous frame and
+    returns their dirty rects. Call invalidate() when the cities change.
+    """
+    def __init__(self, cities):
+        self.set_cities(cities)
+
+    def set_cities(self, cities):
+        # New instance: the cached background shows the old cities. Coordinates become
+        # Python floats once here, since pygame rejects NumPy scalars (e.g. dataset float32 rows)
+        self.cities = [(float(x), float(y)) for x, y in cities]
+        self.invalidate()
+
+    def invalidate(self):
+        self._background = None
+        self._drawn_on = None
+        self._drawn_route = []
+
+    def _build_background(self, size):
+        background = pygame.Surface(size)
+        background.fill((255, 255, 255))
+
+        # Draw each city as a blue circle with its index
+        font = pygame.font.SysFont(None, 24)
+        for idx, (x, y) in enumerate(self.cities):
+            pygame.draw.circle(background, (0, 0, 255), (x, y), 8)
+            text = font.render(str(idx), True, (0, 0, 0))
+            background.blit(text, (x - 10, y - 10))
+        return background
+
+    def draw(self, screen, route):
+        if self._background is None or self._background.get_size() != screen.get_size():
+            self._background = self._build_background(screen.get_size())
+            self._drawn_on = None
+
+        # Redraw everything if the screen changed or the route is not an extension
+        # of what is already on screen (e.g. after a reset)
+        drawn = len(self._drawn_route)
+        if self._drawn_on is not screen or route[:drawn] != self._drawn_route:
+            screen.blit(self._background, (0, 0))
+            self._drawn_on = screen
+            self._drawn_route = []
+            drawn = 0
+            dirty = [screen.get_rect()]
+        else:
+            dirty = []
+
+        # Draw only the new route segments
+        start = max(drawn - 1, 0)
+        if len(route) - start > 1:
+            points = [self.cities[i] for i in route[start:]]
+            dirty.append(pygame.draw.lines(screen, (255, 0, 0), False, points, 2))
+        self._drawn_route = list(route)
+        return dirty
@@ -0,0 +1,105 @@
+# tsp_solvers.py
+import functools
+import numpy as np
+
+# Held-Karp needs O(2^n * n) memory, which is about 50 MB at 20 cities
+HELD_KARP_MAX_CITIES = 22
+
+@functools.lru_cache(maxsize=16)
+def _distance_matrix(cities):
+    coords = np.asarray(cities, dtype=np.float64)
+    diff = coords[:, None, :] - coords[None, :, :]
+    dist = np.hypot(diff[..., 0], diff[..., 1]).astype(np.float32)
+    dist.flags.writeable = False
+    return dist
+
+def distance_matrix(cities):
+    """Float32 matrix of Euclidean distances between all cities, computed once per city list and shared."""
+    return _distance_matrix(tuple(map(tuple, cities)))
+
+def candidate_lists(dist, k):
+    """
+    Each city's k nearest other cities, closest first, as an (n, k) int array
+    taken from the sorted distance matrix. A stack of matrices (..., n, n) gives (..., n, k).
+    """
+    n = dist.shape[-1]
+    k = min(k, n - 1)
+    d = np.where(np.eye(n, dtype=bool), np.inf, np.asarray(dist, dtype=np.float64))
+    nearest = np.argpartition(d, k - 1, axis=-1)[..., :k]
+    order = np.argsort(np.take_along_axis(d, nearest, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(nearest, order, axis=-1)
+
+def candidate_slots(candidates):
+    # slot_of[c, j] = position of city j in c's candidate list, or k if it is not a candidate
+    n, k = candidates.shape
+    slot_of = np.full((n, n), k, dtype=np.intp)
+    slot_of[np.arange(n)[:, None], candidates] = np.arange(k)
+    return slot_of
+
+def tour_length(route, dist):
+    # Length of the closed tour visiting route in order and returning to its first city
+    route = np.asarray(route)
+    if len(route) > 1 and route[-1] == route[0]:
+        route = route[:-1]
+    return float(dist[route, np.roll(route, -1)].sum(dtype=np.float64))
+
+def nearest_neighbour_tour(dist, start=0):
+    """Greedy baseline: always move to the closest unvisited city. Returns (length, tour)."""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        candidates = np.where(visited, np.inf, dist[tour[-1]])
+        nxt = int(np.argmin(candidates))
+        visited[nxt] = True
+        tour.append(nxt)
+    return tour_length(tour, dist), tour
+
+def held_karp(dist, start=0):
+    """
+    Exact TSP optimum by Held-Karp dynamic programming, vectorized over all
+    subsets of the same size. Returns (length, tour) with the tour starting at start.
+    """
+    n = len(dist)
+    if n > HELD_KARP_MAX_CITIES:
+        raise ValueError(f"Held-Karp is limited to {HELD_KARP_MAX_CITIES} cities, got {n}")
+    if n < 3:
+        tour = list(range(n))
+        return tour_length(tour, dist), tour
+    # Work on the other cities only; bit j of a subset mask stands for others[j]
+    others = np.array([c for c in range(n) if c != start])
+    m = n - 1
+    d = np.asarray(dist, dtype=np.float32)
+    inner = d[np.ix_(others, others)]
+
+    # best[mask, j]: shortest path from start through the cities in mask, ending at others[j]
+    best = np.full((1 << m, m), np.inf, dtype=np.float32)
+    parent = np.zeros((1 << m, m), dtype=np.int8)
+    singles = 1 << np.arange(m)
+    best[singles, np.arange(m)] = d[start, others]
+
+    masks = np.arange(1 << m)
+    popcount = np.zeros(1 << m, dtype=np.int8)
+    for j in range(m):
+        popcount += (masks >> j) & 1
+
+    for size in range(2, m + 1):
+        layer = masks[popcount == size]
+        for j in range(m):
+            sel = layer[(layer >> j) & 1 == 1]
+            # Extend every path over sel without j by the edge k -> j
+            candidates = best[sel ^ (1 << j)] + inner[:, j]
+            parent[sel, j] = np.argmin(candidates, axis=1)
+            best[sel, j] = candidates[np.arange(len(sel)), parent[sel, j]]
+
+    # Close the tour and walk the parents back
+    full = (1 << m) - 1
+    last = int(np.argmin(best[full] + d[others, start]))
+    tour = []
+    mask = full
+    for _ in range(m):
+        tour.append(int(others[last]))
+        mask, last = mask ^ (1 << last), int(parent[mask, last])
+    tour = [start] + tour[::-1]
+    return tour_length(tour, dist), tour
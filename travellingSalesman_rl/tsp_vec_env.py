@@ -0,0 +1,212 @@
+# tsp_vec_env.py
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+import config
+from tsp_gym_env import INVALID_ACTION_MODES, OBSERVATION_MODES, make_observation_space, normalised_coords
+from tsp_solvers import candidate_lists, distance_matrix
+
+class TSPVecEnv(VecEnv):
+    """
+    num_envs TSP tours simulated together in NumPy arrays, implementing the
+    stable-baselines3 VecEnv interface. Rewards, observation encodings and
+    invalid action handling match TSPGymEnv; finished tours are reset
+    automatically and their last observation is stored in
+    info["terminal_observation"], as SB3 expects. Every tour has its own
+    instance arrays, so with instances (e.g. TSPDataset.stream()) each reset
+    tour moves on to the next instance.
+    """
+    def __init__(self, num_envs=config.NUM_ENVS, observation_mode="discrete",
+                 city_features=False, invalid_actions="penalise",
+                 candidate_k=None, instances=None):
+        if observation_mode not in OBSERVATION_MODES:
+            raise ValueError(f"Unknown observation mode: {observation_mode}")
+        if invalid_actions not in INVALID_ACTION_MODES:
+            raise ValueError(f"Unknown invalid action handling: {invalid_actions}")
+        if config.NUM_CITIES > 32:
+            raise ValueError("visited masks are stored as uint32, so at most 32 cities are supported")
+        self.observation_mode = observation_mode
+        self.city_features = city_features and observation_mode == "multibinary"
+        self.invalid_actions = invalid_actions
+        self.instances = instances
+        self.num_cities = n = config.NUM_CITIES
+        # K-nearest candidate slots (see CandidateActions): K candidates plus a fallback slot
+        self.candidate_k = min(candidate_k, n - 1) if candidate_k else None
+        self.render_mode = None
+
+        # Per-tour instance: distances, normalised coordinates and, with candidates, neighbour lists
+        self.distances = np.empty((num_envs, n, n), dtype=np.float32)
+        self.coords = np.empty((num_envs, n, 2), dtype=np.float32)
+        self.max_distance = np.empty(num_envs, dtype=np.float32)
+        self.optimal_length = np.full(num_envs, np.nan)
+        self.candidates = np.empty((num_envs, n, self.candidate_k), dtype=np.int64) if self.candidate_k else None
+        self._set_instances(np.arange(num_envs), [(config.CITIES, distance_matrix(config.CITIES), np.nan)] * num_envs)
+
+        # Per-tour state
+        self.current_city = np.zeros(num_envs, dtype=np.int64)
+        self.visited = np.zeros((num_envs, n), dtype=bool)
+        self.visited_mask = np.zeros(num_envs, dtype=np.uint32)
+        self.routes = np.zeros((num_envs, n), dtype=np.int64)
+        self.route_len = np.zeros(num_envs, dtype=np.int64)
+        self.tour_length = np.zeros(num_envs, dtype=np.float64)
+        self._rows = np.arange(num_envs)
+        self._actions = None
+
+        # Step counters, as on TSPGymEnv
+        self.total_steps = 0
+        self.useful_steps = 0
+        self.episodes_completed = 0
+
+        num_actions = self.candidate_k + 1 if self.candidate_k else n
+        super().__init__(num_envs, make_observation_space(n, observation_mode, self.city_features),
+                         spaces.Discrete(num_actions))
+
+    def _set_instances(self, indices, instances):
+        # instances: one (coords, distances, optimal) tuple per index
+        coords, distances, optimal_length = zip(*instances)
+        self.distances[indices] = np.stack(distances)
+        self.coords[indices] = normalised_coords(np.stack(coords))
+        self.optimal_length[indices] = np.array(optimal_length, dtype=np.float64)
+        self.max_distance[indices] = np.maximum(self.distances[indices].max(axis=(1, 2)), 1e-6)
+        if self.candidate_k:
+            self.candidates[indices] = candidate_lists(self.distances[indices], self.candidate_k)
+
+    def _reset_tours(self, indices):
+        if self.instances is not None:
+            self._set_instances(indices, [next(self.instances) for _ in indices])
+        self.current_city[indices] = 0
+        self.visited[indices] = False
+        self.visited[indices, 0] = True
+        self.visited_mask[indices] = 1
+        self.routes[indices, 0] = 0
+        self.route_len[indices] = 1
+        self.tour_length[indices] = 0.0
+
+    def _obs(self, indices=None):
+        rows = self._rows if indices is None else indices
+        current_city = self.current_city[rows]
+        if self.observation_mode == "discrete":
+            return {'current_city': current_city.copy(), 'visited_mask': self.visited_mask[rows].astype(np.int64)}
+        obs = {'current_city': current_city.copy(), 'visited': self.visited[rows].astype(np.int8)}
+        if self.city_features:
+            distances = self.distances[rows, current_city, :, None] / self.max_distance[rows, None, None]
+            obs['city_features'] = np.concatenate([self.coords[rows], distances], axis=-1)
+        return obs
+
+    def _slot_mask(self, valid):
+        # Open candidate slots per tour, plus the fallback once all K candidates are visited
+        neighbours = self.candidates[self._rows, self.current_city]
+        open_candidates = np.take_along_axis(valid, neighbours, axis=1)
+        fallback = ~open_candidates.any(axis=1) & valid.any(axis=1)
+        return np.concatenate([open_candidates, fallback[:, None]], axis=1)
+
+    def _nearest(self, valid):
+        # Nearest city in valid from each tour's current city
+        return np.argmin(np.where(valid, self.distances[self._rows, self.current_city], np.inf), axis=1)
+
+    def action_masks(self):
+        # Boolean (num_envs, num_actions) mask of the cities or candidate slots each tour may still choose
+        if self.candidate_k:
+            return self._slot_mask(~self.visited)
+        return ~self.visited
+
+    def reset(self):
+        self._reset_tours(self._rows)
+        return self._obs()
+
+    def step_async(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        if actions.min() < 0 or actions.max() >= self.action_space.n:
+            raise ValueError(f"actions must lie in [0, {self.action_space.n}), got {actions.min()}..{actions.max()}")
+        self._actions = actions
+
+    def step_wait(self):
+        actions = self._actions
+        rows = self._rows
+        valid = ~self.visited
+        if self.candidate_k:
+            # Translate candidate slots into cities; closed slots count as invalid moves
+            invalid = ~self._slot_mask(valid)[rows, actions]
+            direct = self.candidates[rows, self.current_city, np.minimum(actions, self.candidate_k - 1)]
+            actions = np.where(actions == self.candidate_k, self._nearest(valid), direct)
+        else:
+            invalid = self.visited[rows, actions]
+        if self.invalid_actions == "remap":
+            # Send invalid choices to the nearest unvisited city
+            actions = np.where(invalid, self._nearest(valid), actions)
+            moved = rows
+        else:
+            moved = rows[~invalid]
+        self.total_steps += self.num_envs
+        self.useful_steps += len(moved)
+
+        rewards = np.full(self.num_envs, -100.0, dtype=np.float32)
+        targets = actions[moved]
+        step_lengths = self.distances[moved, self.current_city[moved], targets]
+        rewards[moved] = -step_lengths
+        self.tour_length[moved] += step_lengths
+        self.visited[moved, targets] = True
+        self.visited_mask[moved] |= np.left_shift(np.uint32(1), targets.astype(np.uint32))
+        self.routes[moved, self.route_len[moved]] = targets
+        self.route_len[moved] += 1
+        self.current_city[moved] = targets
+
+        # Finished tours pay for the return to the start city
+        dones = self.route_len == self.num_cities
+        done_idx = np.flatnonzero(dones)
+        closing = self.distances[done_idx, self.current_city[done_idx], 0]
+        rewards[done_idx] -= closing
+        self.tour_length[done_idx] += closing
+
+        infos = [{} for _ in range(self.num_envs)]
+        if len(done_idx):
+            self.episodes_completed += len(done_idx)
+            terminal = self._obs(done_idx)
+            for j, i in enumerate(done_idx):
+                infos[i] = {
+                    'terminal_observation': {key: value[j] for key, value in terminal.items()},
+                    'TimeLimit.truncated': False,
+                    'tour_length': float(self.tour_length[i]),
+                    'route': self.routes[i].tolist(),
+                }
+                if not np.isnan(self.optimal_length[i]):
+                    infos[i]['optimal_length'] = float(self.optimal_length[i])
+            self._reset_tours(done_idx)
+        return self._obs(), rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        # Per-tour arrays are split by env; everything else is shared by all envs
+        value = getattr(self, attr_name)
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in self._indices(indices)]
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        # Methods run once over the whole batch; batched results are split by env
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        if isinstance(result, np.ndarray) and result.shape[:1] == (self.num_envs,):
+            return [result[i] for i in self._indices(indices)]
+        return [result for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
+
+    def seed(self, seed=None):
+        # Tours always start at city 0, so there is no randomness to seed
+        return [seed for _ in range(self.num_envs)]
+
+    def get_images(self):
+        return []